@@ -5,30 +5,294 @@ Supports multiple conversion methods with automatic fallback
 """
 
 import os
+import re
 import sys
 import json
+import mmap
 import shutil
+import fnmatch
 import tempfile
+import threading
+import weakref
+import functools
 import argparse
 import subprocess
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Setup logging ($LOGLEVEL lets batch/CI callers silence output, e.g. LOGLEVEL=WARNING)
+_log_level = logging.getLevelName(os.environ.get('LOGLEVEL', 'INFO').upper())
+logging.basicConfig(level=_log_level if isinstance(_log_level, int) else logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Separates documents when several files are rendered in a single pandoc run
+_BATCH_TOKEN = "CD985272F78311"
+
+# Markdown that resolves across the joined source of a batched run: footnotes
+# (collected at the very end), reference definitions and links to header IDs
+_BATCH_UNSAFE_RE = re.compile(r'\[\^[^\]]+\]|^ {0,3}\[[^\]]+\]:|\]\(#', re.MULTILINE)
+
+# Inputs larger than this are decoded from a memory map instead of read()
+_MMAP_THRESHOLD = 1024 * 1024
+
+_MD_EXTS = frozenset({'.md', '.markdown'})
+
+
+@functools.lru_cache(maxsize=32)
+def _read_css_file(css_file: str, mtime: float) -> str:
+    """Read a CSS file; keyed on mtime so edits invalidate the cache"""
+    with open(css_file, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+_MD_LOCAL = threading.local()
+
+
+def _render_markdown(content: str) -> str:
+    """Convert markdown to HTML, reusing one configured Markdown instance per thread"""
+    md = getattr(_MD_LOCAL, 'md', None)
+    if md is None:
+        import markdown
+        md = markdown.Markdown(extensions=['extra', 'codehilite', 'toc'], output_format='html5')
+        _MD_LOCAL.md = md
+    # reset() clears per-document state (footnotes, toc) but keeps the extensions
+    return md.reset().convert(content)
+
+
+def _fadvise(fd: int, advice_name: str) -> None:
+    """Give the kernel a page-cache hint for fd, where the platform supports it"""
+    try:
+        os.posix_fadvise(fd, 0, 0, getattr(os, advice_name))
+    except (AttributeError, OSError):
+        pass
+
+
+def _read_input(input_path: Path) -> str:
+    """Read an input file, decoding large files straight from a memory map"""
+    with open(input_path, 'rb') as f:
+        # Read top to bottom once: ask for aggressive read-ahead, then let the
+        # kernel drop the pages so big batches don't flood the page cache
+        _fadvise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+        try:
+            if os.fstat(f.fileno()).st_size <= _MMAP_THRESHOLD:
+                with open(f.fileno(), 'r', encoding='utf-8', closefd=False) as text:
+                    return text.read()
+            
+            # Decoding from the mapping avoids holding a bytes copy alongside the str
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, 'utf-8')
+        finally:
+            _fadvise(f.fileno(), 'POSIX_FADV_DONTNEED')
+
+
+def _is_markdown(path: Path) -> bool:
+    """Whether path has a markdown extension"""
+    return path.suffix.lower() in _MD_EXTS
+
+
+def _to_html(content: str, is_md: bool) -> str:
+    """Return HTML for the input, rendering markdown when needed"""
+    return _render_markdown(content) if is_md else content
+
+
+_HTML_TAIL = '</body></html>'
+
+
+@functools.lru_cache(maxsize=32)
+def _html_head(css_content: str = '', base_href: str = '') -> str:
+    """Document boilerplate up to <body>, built once per stylesheet/base"""
+    base = f'<base href="{base_href}">' if base_href else ''
+    style = f'<style>{css_content}</style>' if css_content else ''
+    return f'<!DOCTYPE html><html><head><meta charset="utf-8">{base}{style}</head><body>'
+
+
+def _wrap_html(html_content: str, css_content: str = '',
+               base_dir: Optional[Path] = None) -> str:
+    """Wrap an HTML fragment in a standalone document with inline CSS"""
+    base_href = base_dir.resolve().as_uri() + '/' if base_dir else ''
+    return ''.join((_html_head(css_content, base_href), html_content, _HTML_TAIL))
+
+
+def _render_html_file(job: Tuple[Path, Path, str]) -> Optional[str]:
+    """Render one input to a standalone HTML file; returns an error message on failure"""
+    input_path, html_path, css_content = job
+    try:
+        html_content = _to_html(_read_input(input_path), _is_markdown(input_path))
+        html_path.write_text(_wrap_html(html_content, css_content, base_dir=input_path.parent),
+                             encoding='utf-8')
+        return None
+    except Exception as e:
+        return str(e)
+
+
+def _remove_temp_dir(temp_dir: str) -> None:
+    """Remove a generator's temp directory in one pass"""
+    try:
+        shutil.rmtree(temp_dir)
+    except Exception as e:
+        logger.warning("Could not clean up temp directory: %s", e)
+
+
+def _ram_temp_root() -> Optional[str]:
+    """Prefer RAM-backed /dev/shm for intermediate files; None means the default TMPDIR"""
+    shm = '/dev/shm'
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _tool_path(name: str) -> str:
+    """Absolute path of an external tool (falls back to the bare name)"""
+    return shutil.which(name) or name
+
+
+def _run_tool(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """Run an external tool so that CPython can launch it with posix_spawn"""
+    # subprocess only takes the posix_spawn fast path (no fork of our address
+    # space) for an absolute executable with close_fds=False. Leaving fds open
+    # is safe: Python creates its own descriptors non-inheritable (PEP 446).
+    return subprocess.run([_tool_path(cmd[0]), *cmd[1:]], close_fds=False, **kwargs)
+
+
+def _popen_tool(cmd: List[str], **kwargs) -> subprocess.Popen:
+    """Start an external tool the same way as _run_tool, for pipelines"""
+    return subprocess.Popen([_tool_path(cmd[0]), *cmd[1:]], close_fds=False, **kwargs)
+
+
+def _list_files(directory: Path, pattern: str) -> List[Path]:
+    """List files in directory matching pattern"""
+    if '/' in pattern or '**' in pattern:
+        # Recursive / nested patterns still need pathlib's glob
+        return [p for p in directory.glob(pattern) if p.is_file()]
+    # scandir returns the entry type with the listing, avoiding a stat per file
+    with os.scandir(directory) as entries:
+        return [Path(e.path) for e in entries
+                if fnmatch.fnmatch(e.name, pattern) and e.is_file()]
+
+
+def _quote_wkhtmltopdf_arg(arg: str) -> str:
+    """Quote an argument for wkhtmltopdf's --read-args-from-stdin parser"""
+    return '"' + arg.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+@dataclass(frozen=True)
+class PdfConfig:
+    """Resolved generator configuration with fixed attribute slots"""
+    __slots__ = ('page_size', 'margin_top', 'margin_bottom', 'margin_left', 'margin_right',
+                 'encoding', 'highlight_style', 'toc', 'number_sections', 'preserve_tabs',
+                 'standalone')
+    
+    page_size: str
+    margin_top: str
+    margin_bottom: str
+    margin_left: str
+    margin_right: str
+    encoding: str
+    highlight_style: str
+    toc: bool
+    number_sections: bool
+    preserve_tabs: bool
+    standalone: bool
+    
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> 'PdfConfig':
+        """Build from the JSON-style dict (nested "margins")"""
+        margins = config['margins']
+        return cls(
+            page_size=config['page_size'],
+            margin_top=margins['top'],
+            margin_bottom=margins['bottom'],
+            margin_left=margins['left'],
+            margin_right=margins['right'],
+            encoding=config['encoding'],
+            highlight_style=config['highlight_style'],
+            toc=config['toc'],
+            number_sections=config['number_sections'],
+            preserve_tabs=config['preserve_tabs'],
+            standalone=config['standalone']
+        )
+
+
+_AVAILABLE_TOOLS: Optional[Dict[str, bool]] = None
+_AVAILABLE_TOOLS_LOCK = threading.Lock()
+
+
+def _detect_tools() -> Dict[str, bool]:
+    """Probe for PDF generation tools without importing the Python packages"""
+    tools = {}
+    
+    for name, label in (('pandoc', 'Pandoc'), ('wkhtmltopdf', 'wkhtmltopdf')):
+        tools[name] = shutil.which(name) is not None
+        if tools[name]:
+            logger.info("✓ %s found", label)
+        else:
+            logger.warning("✗ %s not found", label)
+    
+    for name, label in (('pdfkit', 'pdfkit (Python)'), ('md2pdf', 'md2pdf (Python)'),
+                        ('weasyprint', 'WeasyPrint'), ('playwright', 'Playwright')):
+        tools[name] = importlib.util.find_spec(name) is not None
+        if tools[name]:
+            logger.info("✓ %s found", label)
+        else:
+            logger.warning("✗ %s not installed", label)
+    
+    return tools
+
+
+def _get_available_tools() -> Dict[str, bool]:
+    """Return tool availability, detected once per process"""
+    global _AVAILABLE_TOOLS
+    with _AVAILABLE_TOOLS_LOCK:
+        if _AVAILABLE_TOOLS is None:
+            _AVAILABLE_TOOLS = _detect_tools()
+        return _AVAILABLE_TOOLS
+
+
 class PDFGenerator:
     """Main PDF generation class with multiple backend support"""
     
     def __init__(self, config_path: Optional[str] = None):
         """Initialize PDF generator with configuration"""
         self.config = self.load_config(config_path)
-        self.available_tools = self.check_available_tools()
-        self.temp_dir = tempfile.mkdtemp(prefix='pdf_gen_')
+        self._config_path = config_path
+        self._ensured_dirs = set()
+        self.available_tools = _get_available_tools()
+        self.temp_dir = tempfile.mkdtemp(prefix='pdf_gen_', dir=_ram_temp_root())
+        # Removes temp_dir on cleanup(), garbage collection or interpreter exit
+        self._finalizer = weakref.finalize(self, _remove_temp_dir, self.temp_dir)
+        self._css_temp_path: Optional[str] = None
+        self._css_temp_lock = threading.Lock()
+        self._weasy_fonts = None
+        self._weasy_css: Dict[str, Any] = {}
+        self._weasy_lock = threading.Lock()
+        
+        # Config-derived command line flags never change, so build them once
+        self._wkhtmltopdf_args = self._wkhtmltopdf_options()
+        self._pandoc_html_args = self._pandoc_html_options()
+        self._pandoc_base_args = self._pandoc_options()
+        self._pdfkit_options = {
+            'page-size': self.config.page_size,
+            'margin-top': self.config.margin_top,
+            'margin-right': self.config.margin_right,
+            'margin-bottom': self.config.margin_bottom,
+            'margin-left': self.config.margin_left,
+            'encoding': "UTF-8",
+            'enable-local-file-access': None
+        }
         
-    def load_config(self, config_path: Optional[str] = None) -> Dict[str, Any]:
+    def load_config(self, config_path: Optional[str] = None) -> 'PdfConfig':
         """Load configuration from JSON file or use defaults"""
         default_config = {
             "page_size": "A4",
@@ -48,65 +312,24 @@ class PDFGenerator:
         
         if config_path and Path(config_path).exists():
             try:
-                with open(config_path, 'r') as f:
-                    user_config = json.load(f)
-                    default_config.update(user_config)
+                user_config = _json_loads(Path(config_path).read_bytes())
+                # Merge margins so a partial override keeps the other sides
+                margins = {**default_config['margins'], **user_config.get('margins', {})}
+                default_config.update(user_config)
+                default_config['margins'] = margins
             except Exception as e:
-                logger.warning(f"Could not load config file: {e}. Using defaults.")
+                logger.warning("Could not load config file: %s. Using defaults.", e)
         
-        return default_config
+        return PdfConfig.from_dict(default_config)
     
     def check_available_tools(self) -> Dict[str, bool]:
         """Check which PDF generation tools are available"""
-        tools = {
-            'pandoc': False,
-            'wkhtmltopdf': False,
-            'pdfkit': False,
-            'md2pdf': False,
-            'weasyprint': False
-        }
-        
-        # Check for pandoc
-        if shutil.which('pandoc'):
-            tools['pandoc'] = True
-            logger.info("✓ Pandoc found")
-        else:
-            logger.warning("✗ Pandoc not found")
-        
-        # Check for wkhtmltopdf
-        if shutil.which('wkhtmltopdf'):
-            tools['wkhtmltopdf'] = True
-            logger.info("✓ wkhtmltopdf found")
-        else:
-            logger.warning("✗ wkhtmltopdf not found")
-        
-        # Check for Python packages
-        try:
-            import pdfkit
-            tools['pdfkit'] = True
-            logger.info("✓ pdfkit (Python) found")
-        except ImportError:
-            logger.warning("✗ pdfkit not installed")
-        
-        try:
-            import md2pdf
-            tools['md2pdf'] = True
-            logger.info("✓ md2pdf (Python) found")
-        except ImportError:
-            logger.warning("✗ md2pdf not installed")
-        
-        try:
-            import weasyprint
-            tools['weasyprint'] = True
-            logger.info("✓ WeasyPrint found")
-        except ImportError:
-            logger.warning("✗ WeasyPrint not installed")
-        
-        return tools
+        return dict(_get_available_tools())
     
     def convert(self, input_file: str, output_file: str, 
                 css_file: Optional[str] = None, 
-                method: Optional[str] = None) -> bool:
+                method: Optional[str] = None,
+                force: bool = False) -> bool:
         """
         Convert input file to PDF using available methods
         
@@ -115,6 +338,7 @@ class PDFGenerator:
             output_file: Path to output PDF
             css_file: Optional CSS file for styling
             method: Force specific conversion method
+            force: Convert even if the output is newer than its sources
         
         Returns:
             True if successful, False otherwise
@@ -123,205 +347,472 @@ class PDFGenerator:
         output_path = Path(output_file)
         
         if not input_path.exists():
-            logger.error(f"Input file not found: {input_file}")
+            logger.error("Input file not found: %s", input_file)
             return False
         
+        if not force and self._is_up_to_date(input_path, output_path, css_file):
+            logger.info("Up to date, skipping: %s", output_path)
+            return True
+        
         # Ensure output directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(output_path.parent)
+        
+        # Resolve per-file facts once; the backends below trust these
+        is_md = _is_markdown(input_path)
+        if css_file and not Path(css_file).exists():
+            css_file = None
         
         # Determine conversion method
         if method:
             if method == 'pandoc' and self.available_tools['pandoc']:
-                return self._convert_with_pandoc(input_path, output_path, css_file)
+                return self._convert_with_pandoc(input_path, output_path, css_file, is_md)
             elif method == 'python':
-                return self._convert_with_python(input_path, output_path, css_file)
+                return self._convert_with_python(input_path, output_path, css_file, is_md)
             else:
-                logger.error(f"Method {method} not available")
+                logger.error("Method %s not available", method)
                 return False
         
         # Try methods in order of preference
         if self.available_tools['pandoc']:
-            if self._convert_with_pandoc(input_path, output_path, css_file):
+            if self._convert_with_pandoc(input_path, output_path, css_file, is_md):
                 return True
             logger.warning("Pandoc conversion failed, trying Python fallback...")
         
-        return self._convert_with_python(input_path, output_path, css_file)
+        return self._convert_with_python(input_path, output_path, css_file, is_md)
     
     def _convert_with_pandoc(self, input_path: Path, output_path: Path, 
-                            css_file: Optional[str] = None) -> bool:
+                            css_file: Optional[str] = None,
+                            is_md: Optional[bool] = None) -> bool:
         """Convert using pandoc with wkhtmltopdf or fallback"""
+        if is_md is None:
+            is_md = _is_markdown(input_path)
+        
+        # Fast path: stream pandoc's HTML straight into wkhtmltopdf
+        if self.available_tools['wkhtmltopdf'] and is_md:
+            if self._convert_md_direct(input_path, output_path, css_file):
+                return True
+            logger.warning("Direct pandoc → wkhtmltopdf pipeline failed, retrying via pandoc's PDF engine...")
+        
         try:
-            cmd = ['pandoc', str(input_path), '-o', str(output_path)]
+            cmd = self._build_pandoc_cmd([input_path], output_path, css_file)
             
-            # Add configuration options
-            if self.config['standalone']:
-                cmd.append('--standalone')
+            # Execute conversion
+            result = _run_tool(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
             
-            if self.config['toc']:
-                cmd.append('--toc')
+            if result.returncode == 0:
+                logger.info("✓ PDF created successfully: %s", output_path)
+                return True
+            else:
+                logger.error("Pandoc error: %s", result.stderr)
+                return False
+                
+        except Exception as e:
+            logger.error("Pandoc conversion failed: %s", e)
+            return False
+    
+    def _convert_md_direct(self, input_path: Path, output_path: Path,
+                           css_file: Optional[str] = None) -> bool:
+        """Pipe pandoc's HTML output directly into wkhtmltopdf, with no temp files"""
+        # wkhtmltopdf spools stdin to its own temp file and resolves relative
+        # URLs against that, so the input directory is set as the <base>
+        base = f'<base href="{input_path.parent.resolve().as_uri()}/">'
+        pandoc_cmd = ['pandoc', str(input_path.resolve()), '-t', 'html5', '--standalone',
+                      '--metadata', f'pagetitle={input_path.stem}',
+                      '-V', f'header-includes={base}',
+                      *self._pandoc_html_args, '--css', self._pandoc_css_path(css_file)]
+        wkhtmltopdf_cmd = ['wkhtmltopdf', '--quiet', '--enable-local-file-access',
+                           *self._wkhtmltopdf_args, '-', str(output_path.resolve())]
+        
+        try:
+            # pandoc's stderr goes to a file: a pipe left unread until wkhtmltopdf
+            # exits could fill up and stall pandoc, and with it the whole pipeline
+            with tempfile.TemporaryFile(dir=self.temp_dir) as pandoc_stderr:
+                with _popen_tool(pandoc_cmd, stdout=subprocess.PIPE, stderr=pandoc_stderr) as pandoc:
+                    with _popen_tool(wkhtmltopdf_cmd, stdin=pandoc.stdout,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as wkhtmltopdf:
+                        # Drop our copy so pandoc sees EOF/SIGPIPE if wkhtmltopdf exits early
+                        pandoc.stdout.close()
+                        _, wkhtmltopdf_err = wkhtmltopdf.communicate()
+                    pandoc.wait()
+                pandoc_stderr.seek(0)
+                pandoc_err = pandoc_stderr.read()
             
-            if self.config['number_sections']:
-                cmd.append('--number-sections')
+            if pandoc.returncode != 0:
+                logger.error("Pandoc error: %s", pandoc_err.decode(errors='replace'))
+                return False
+            if wkhtmltopdf.returncode != 0:
+                logger.error("wkhtmltopdf error: %s", wkhtmltopdf_err.decode(errors='replace'))
+                return False
             
-            # Set highlight style for code blocks
-            cmd.extend(['--highlight-style', self.config['highlight_style']])
+            logger.info("✓ PDF created successfully: %s", output_path)
+            return True
             
-            # Add CSS if provided
-            if css_file and Path(css_file).exists():
-                cmd.extend(['--css', css_file])
-            else:
-                # Use default CSS
-                default_css = self._get_default_css()
+        except Exception as e:
+            logger.error("Direct pandoc conversion failed: %s", e)
+            return False
+    
+    def _build_pandoc_cmd(self, input_paths: List[Path], output_path: Path,
+                          css_file: Optional[str] = None) -> List[str]:
+        """Build the pandoc command line for one or more inputs"""
+        return ['pandoc', *[str(p) for p in input_paths], '-o', str(output_path),
+                *self._pandoc_base_args, '--css', self._pandoc_css_path(css_file)]
+    
+    def _pandoc_options(self) -> List[str]:
+        """pandoc flags derived from the configuration and available tools"""
+        args = ['--standalone'] if self.config.standalone else []
+        args.extend(self._pandoc_html_args)
+        
+        # Try with wkhtmltopdf if available
+        if self.available_tools['wkhtmltopdf']:
+            args.extend(['--pdf-engine', 'wkhtmltopdf'])
+            for opt in self._wkhtmltopdf_args:
+                args.extend(['--pdf-engine-opt', opt])
+        
+        return args
+    
+    def _pandoc_html_options(self) -> List[str]:
+        """pandoc flags that shape the rendered HTML"""
+        args = []
+        
+        if self.config.toc:
+            args.append('--toc')
+        
+        if self.config.number_sections:
+            args.append('--number-sections')
+        
+        # Set highlight style for code blocks
+        args.extend(['--highlight-style', self.config.highlight_style])
+        
+        return args
+    
+    def _pandoc_css_path(self, css_file: Optional[str] = None) -> str:
+        """Return the CSS file to hand to pandoc, writing the default CSS if needed"""
+        # Callers have already dropped css_file if it doesn't exist
+        if css_file:
+            return css_file
+        # Default CSS is written once per generator and shared by all conversions
+        with self._css_temp_lock:
+            if self._css_temp_path is None:
                 css_temp = Path(self.temp_dir) / 'default.css'
-                css_temp.write_text(default_css)
-                cmd.extend(['--css', str(css_temp)])
+                css_temp.write_text(self._get_default_css())
+                self._css_temp_path = str(css_temp)
+        return self._css_temp_path
+    
+    def _wkhtmltopdf_options(self) -> List[str]:
+        """wkhtmltopdf page options derived from the configuration"""
+        return [
+            f"--margin-top={self.config.margin_top}",
+            f"--margin-bottom={self.config.margin_bottom}",
+            f"--margin-left={self.config.margin_left}",
+            f"--margin-right={self.config.margin_right}",
+            f"--page-size={self.config.page_size}"
+        ]
+    
+    def _render_html_with_wkhtmltopdf(self, html: str, output_path: Path) -> bool:
+        """Render an HTML string to PDF by piping it into wkhtmltopdf"""
+        cmd = ['wkhtmltopdf', '--quiet', '--enable-local-file-access',
+               *self._wkhtmltopdf_args, '-', str(output_path)]
+        result = _run_tool(cmd, input=html, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                           text=True)
+        
+        if result.returncode == 0:
+            logger.info("✓ PDF created successfully: %s", output_path)
+            return True
+        logger.error("wkhtmltopdf error: %s", result.stderr)
+        return False
+    
+    def _batch_convert_with_pandoc(self, files: List[Path], output_files: List[Path],
+                                   max_workers: Optional[int] = None) -> Optional[List[bool]]:
+        """
+        Convert many markdown files with a single pandoc invocation
+        
+        The inputs are joined with a sentinel paragraph, rendered to HTML in one
+        pandoc run (paying its startup cost once), split back on the sentinel and
+        handed to wkhtmltopdf per document.
+        
+        Returns:
+            Per-file results, or None if the batch could not be split (or the
+            inputs use footnotes or link references, which pandoc resolves
+            across documents) and the caller should convert files one at a time
+        """
+        try:
+            sources = [f.read_text(encoding=self.config.encoding) for f in files]
+            if any(_BATCH_UNSAFE_RE.search(source) for source in sources):
+                logger.info("Footnotes or link references found, converting files individually")
+                return None
+            # Only the first document's YAML front matter would be read as
+            # metadata in the joined source
+            if any(source.partition('\n')[0].rstrip() == '---' for source in sources):
+                logger.info("YAML front matter found, converting files individually")
+                return None
+            separator = f"\n\n{_BATCH_TOKEN}\n\n"
+            combined = separator.join(sources)
             
-            # Try with wkhtmltopdf if available
-            if self.available_tools['wkhtmltopdf']:
-                cmd.extend(['--pdf-engine', 'wkhtmltopdf'])
-                
-                # Add wkhtmltopdf specific options
-                pdf_options = [
-                    f"--margin-top={self.config['margins']['top']}",
-                    f"--margin-bottom={self.config['margins']['bottom']}",
-                    f"--margin-left={self.config['margins']['left']}",
-                    f"--margin-right={self.config['margins']['right']}",
-                    f"--page-size={self.config['page_size']}"
-                ]
-                
-                for opt in pdf_options:
-                    cmd.extend(['--pdf-engine-opt', opt])
+            cmd = ['pandoc', '-f', 'markdown', '-t', 'html5', '--standalone',
+                   '--metadata', 'pagetitle=document',
+                   '--highlight-style', self.config.highlight_style,
+                   '--css', self._pandoc_css_path()]
+            result = _run_tool(cmd, input=combined, capture_output=True, text=True)
             
-            # Execute conversion
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.warning("Batched pandoc run failed: %s", result.stderr)
+                return None
+            
+            html = result.stdout
+            body_start = html.find('<body>') + len('<body>')
+            body_end = html.rfind('</body>')
+            if body_start < len('<body>') or body_end < body_start:
+                return None
+            
+            head = html[:body_start]
+            tail = html[body_end:]
+            chunks = html[body_start:body_end].split(f"<p>{_BATCH_TOKEN}</p>")
+            
+            if len(chunks) != len(files):
+                logger.warning("Batched pandoc output could not be split, converting files individually")
+                return None
+            
+        except Exception as e:
+            logger.warning("Batched pandoc conversion failed: %s", e)
+            return None
+        
+        def render(job: Tuple[str, Path, Path]) -> bool:
+            chunk, input_path, output_file = job
+            # Each document's relative images resolve against its own directory
+            base = f'<base href="{input_path.parent.resolve().as_uri()}/">'
+            return self._render_html_with_wkhtmltopdf(
+                head.replace('<head>', f'<head>\n{base}', 1) + chunk + tail, output_file)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(render, zip(chunks, files, output_files)))
+    
+    def merge_convert(self, input_files: List[str], output_file: str,
+                      css_file: Optional[str] = None) -> bool:
+        """Convert several input files into a single combined PDF with one pandoc run"""
+        if not self.available_tools['pandoc']:
+            logger.error("Merged output requires pandoc")
+            return False
+        
+        output_path = Path(output_file)
+        self._ensure_dir(output_path.parent)
+        if css_file and not Path(css_file).exists():
+            css_file = None
+        
+        try:
+            cmd = self._build_pandoc_cmd([Path(f) for f in input_files], output_path, css_file)
+            result = _run_tool(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
             
             if result.returncode == 0:
-                logger.info(f"✓ PDF created successfully: {output_path}")
+                logger.info("✓ Merged PDF created successfully: %s", output_path)
                 return True
-            else:
-                logger.error(f"Pandoc error: {result.stderr}")
-                return False
-                
+            logger.error("Pandoc error: %s", result.stderr)
+            return False
+            
         except Exception as e:
-            logger.error(f"Pandoc conversion failed: {e}")
+            logger.error("Pandoc conversion failed: %s", e)
             return False
     
     def _convert_with_python(self, input_path: Path, output_path: Path,
-                            css_file: Optional[str] = None) -> bool:
+                            css_file: Optional[str] = None,
+                            is_md: Optional[bool] = None) -> bool:
         """Convert using Python libraries as fallback"""
+        if is_md is None:
+            is_md = _is_markdown(input_path)
+        
         try:
+            # Read the input once and share it across the fallback chain
+            content = _read_input(input_path)
+            html_content = None
+            
             # First, try md2pdf if available
-            if self.available_tools['md2pdf'] and input_path.suffix in ['.md', '.markdown']:
+            if self.available_tools['md2pdf'] and is_md:
                 try:
                     from md2pdf.core import md2pdf
                     
-                    with open(input_path, 'r', encoding='utf-8') as f:
-                        md_content = f.read()
-                    
                     md2pdf(str(output_path),
-                          md_content=md_content,
-                          css_file_path=css_file or None,
+                          md_content=content,
+                          css_file_path=css_file,
                           base_url=str(input_path.parent))
                     
-                    logger.info(f"✓ PDF created with md2pdf: {output_path}")
+                    logger.info("✓ PDF created with md2pdf: %s", output_path)
                     return True
                 except Exception as e:
-                    logger.warning(f"md2pdf failed: {e}")
+                    logger.warning("md2pdf failed: %s", e)
             
             # Try pdfkit with wkhtmltopdf
             if self.available_tools['pdfkit'] and self.available_tools['wkhtmltopdf']:
                 try:
                     import pdfkit
-                    import markdown
-                    
-                    # Read input file
-                    with open(input_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
                     
                     # Convert markdown to HTML if needed
-                    if input_path.suffix in ['.md', '.markdown']:
-                        html_content = markdown.markdown(content, 
-                                                        extensions=['extra', 'codehilite', 'toc'])
-                    else:
-                        html_content = content
+                    if html_content is None:
+                        html_content = _to_html(content, is_md)
                     
                     # Wrap with HTML template
                     css_content = self._get_css_content(css_file)
-                    full_html = f"""
-                    <!DOCTYPE html>
-                    <html>
-                    <head>
-                        <meta charset="utf-8">
-                        <style>{css_content}</style>
-                    </head>
-                    <body>
-                        {html_content}
-                    </body>
-                    </html>
-                    """
-                    
-                    # PDF options
-                    options = {
-                        'page-size': self.config['page_size'],
-                        'margin-top': self.config['margins']['top'],
-                        'margin-right': self.config['margins']['right'],
-                        'margin-bottom': self.config['margins']['bottom'],
-                        'margin-left': self.config['margins']['left'],
-                        'encoding': "UTF-8",
-                        'enable-local-file-access': None
-                    }
+                    full_html = _wrap_html(html_content, css_content)
                     
-                    pdfkit.from_string(full_html, str(output_path), options=options)
-                    logger.info(f"✓ PDF created with pdfkit: {output_path}")
+                    pdfkit.from_string(full_html, str(output_path), options=self._pdfkit_options)
+                    logger.info("✓ PDF created with pdfkit: %s", output_path)
                     return True
                     
                 except Exception as e:
-                    logger.warning(f"pdfkit failed: {e}")
+                    logger.warning("pdfkit failed: %s", e)
             
             # Try WeasyPrint as last resort
             if self.available_tools['weasyprint']:
                 try:
-                    from weasyprint import HTML, CSS
-                    import markdown
-                    
-                    with open(input_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
+                    from weasyprint import HTML
                     
-                    if input_path.suffix in ['.md', '.markdown']:
-                        html_content = markdown.markdown(content,
-                                                        extensions=['extra', 'codehilite', 'toc'])
-                    else:
-                        html_content = content
+                    if html_content is None:
+                        html_content = _to_html(content, is_md)
                     
-                    css_content = self._get_css_content(css_file)
-                    full_html = f"""
-                    <!DOCTYPE html>
-                    <html>
-                    <head>
-                        <meta charset="utf-8">
-                        <style>{css_content}</style>
-                    </head>
-                    <body>
-                        {html_content}
-                    </body>
-                    </html>
-                    """
+                    # Stylesheet is passed separately so it is parsed once, not per document
+                    stylesheet, font_config = self._get_weasyprint_resources(css_file)
+                    full_html = _wrap_html(html_content)
                     
-                    HTML(string=full_html).write_pdf(str(output_path))
-                    logger.info(f"✓ PDF created with WeasyPrint: {output_path}")
+                    HTML(string=full_html).write_pdf(str(output_path),
+                                                     stylesheets=[stylesheet],
+                                                     font_config=font_config)
+                    logger.info("✓ PDF created with WeasyPrint: %s", output_path)
                     return True
                     
                 except Exception as e:
-                    logger.warning(f"WeasyPrint failed: {e}")
+                    logger.warning("WeasyPrint failed: %s", e)
             
             logger.error("All Python conversion methods failed")
             return False
             
         except Exception as e:
-            logger.error(f"Python conversion failed: {e}")
+            logger.error("Python conversion failed: %s", e)
             return False
     
-    def _get_default_css(self) -> str:
+    def _convert_with_python_batch(self, input_paths: List[Path], output_paths: List[Path],
+                                   css_file: Optional[str] = None,
+                                   max_workers: Optional[int] = None) -> Optional[List[bool]]:
+        """
+        Convert a batch with the Python pipeline, keeping the renderer alive
+        
+        Uses one headless Chromium (Playwright) for every document when available,
+        otherwise renders HTML in parallel and converts it with a single
+        wkhtmltopdf process.
+        
+        Returns:
+            Per-file results, or None if no batch renderer is available
+        """
+        css_content = self._get_css_content(css_file)
+        
+        def render(input_path: Path) -> str:
+            html_content = _to_html(_read_input(input_path), _is_markdown(input_path))
+            return _wrap_html(html_content, css_content, base_dir=input_path.parent)
+        
+        if self.available_tools['playwright']:
+            try:
+                return self._render_batch_with_playwright(
+                    [render(p) for p in input_paths], output_paths)
+            except Exception as e:
+                logger.warning("Playwright batch rendering failed: %s", e)
+        
+        if self.available_tools['wkhtmltopdf']:
+            return self._batch_render_with_wkhtmltopdf(input_paths, output_paths,
+                                                       css_content, max_workers)
+        
+        return None
+    
+    def _batch_render_with_wkhtmltopdf(self, input_paths: List[Path], output_paths: List[Path],
+                                       css_content: str,
+                                       max_workers: Optional[int] = None) -> List[bool]:
+        """
+        Two-phase batch: render HTML in parallel, then run wkhtmltopdf once
+        
+        Markdown rendering is CPU-bound Python, so it runs on a process pool.
+        wkhtmltopdf then converts every document in a single process using
+        --read-args-from-stdin (one argument line per document).
+        """
+        html_dir = Path(tempfile.mkdtemp(dir=self.temp_dir))
+        html_paths = [html_dir / f"{i}_{p.stem}.html" for i, p in enumerate(input_paths)]
+        
+        # Phase 1: markdown -> HTML across all cores
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            errors = list(executor.map(_render_html_file,
+                                       [(p, h, css_content) for p, h in zip(input_paths, html_paths)]))
+        
+        # Phase 2: a single wkhtmltopdf process for every rendered document
+        lines = []
+        for input_path, html_path, output_path, error in zip(input_paths, html_paths,
+                                                             output_paths, errors):
+            if error:
+                logger.error("Conversion of %s failed: %s", input_path.name, error)
+                continue
+            # Stale output would otherwise be mistaken for success below
+            output_path.unlink(missing_ok=True)
+            args = ['--quiet', '--enable-local-file-access', *self._wkhtmltopdf_args,
+                    str(html_path), str(output_path)]
+            lines.append(' '.join(_quote_wkhtmltopdf_arg(a) for a in args))
+        
+        if lines:
+            result = _run_tool(['wkhtmltopdf', '--read-args-from-stdin'],
+                               input='\n'.join(lines) + '\n',
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if result.returncode != 0:
+                logger.error("wkhtmltopdf error: %s", result.stderr)
+        
+        results = []
+        for output_path, error in zip(output_paths, errors):
+            success = not error and output_path.exists() and output_path.stat().st_size > 0
+            if success:
+                logger.info("✓ PDF created successfully: %s", output_path)
+            results.append(success)
+        
+        shutil.rmtree(html_dir, ignore_errors=True)
+        return results
+    
+    def _render_batch_with_playwright(self, html_docs: List[str],
+                                      output_paths: List[Path]) -> List[bool]:
+        """Print HTML documents to PDF with a single headless Chromium instance"""
+        from playwright.sync_api import sync_playwright
+        
+        margins = {side: getattr(self.config, f'margin_{side}')
+                   for side in ('top', 'right', 'bottom', 'left')}
+        results = []
+        
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            try:
+                page = browser.new_page()
+                for html, output_path in zip(html_docs, output_paths):
+                    try:
+                        page.set_content(html, wait_until='load')
+                        page.pdf(path=str(output_path),
+                                 format=self.config.page_size,
+                                 margin=margins,
+                                 print_background=True)
+                        logger.info("✓ PDF created with Playwright: %s", output_path)
+                        results.append(True)
+                    except Exception as e:
+                        logger.error("Playwright failed for %s: %s", output_path, e)
+                        results.append(False)
+            finally:
+                browser.close()
+        
+        return results
+    
+    def _get_weasyprint_resources(self, css_file: Optional[str] = None):
+        """Return a parsed WeasyPrint stylesheet and font configuration, built once and reused"""
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+        
+        css_content = self._get_css_content(css_file)
+        with self._weasy_lock:
+            if self._weasy_fonts is None:
+                self._weasy_fonts = FontConfiguration()
+            if css_content not in self._weasy_css:
+                self._weasy_css[css_content] = CSS(string=css_content, font_config=self._weasy_fonts)
+            return self._weasy_css[css_content], self._weasy_fonts
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _get_default_css() -> str:
         """Return default CSS styling"""
         return """
         body {
@@ -421,45 +912,113 @@ class PDFGenerator:
     
     def _get_css_content(self, css_file: Optional[str] = None) -> str:
         """Get CSS content from file or default"""
-        if css_file and Path(css_file).exists():
-            with open(css_file, 'r', encoding='utf-8') as f:
-                return f.read()
+        if css_file:
+            try:
+                return _read_css_file(css_file, os.path.getmtime(css_file))
+            except OSError:
+                pass
         return self._get_default_css()
     
     def batch_convert(self, input_dir: str, output_dir: str,
-                     pattern: str = "*.md") -> List[bool]:
-        """Convert multiple files matching pattern"""
+                     pattern: str = "*.md",
+                     max_workers: Optional[int] = os.cpu_count(),
+                     method: Optional[str] = None,
+                     force: bool = False) -> List[bool]:
+        """Convert multiple files matching pattern, running conversions in parallel"""
         input_path = Path(input_dir)
         output_path = Path(output_dir)
         
         if not input_path.exists():
-            logger.error(f"Input directory not found: {input_dir}")
+            logger.error("Input directory not found: %s", input_dir)
             return []
         
-        output_path.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(output_path)
         
-        files = list(input_path.glob(pattern))
-        results = []
+        files = _list_files(input_path, pattern)
+        output_files = [output_path / f"{file.stem}.pdf" for file in files]
+        # Files whose PDF is newer than the source count as done
+        results = [True] * len(files)
+        pending = [i for i in range(len(files))
+                   if force or not self._is_up_to_date(files[i], output_files[i])]
         
-        logger.info(f"Found {len(files)} files to convert")
+        logger.info("Found %s files, %s to convert", len(files), len(pending))
         
-        for i, file in enumerate(files, 1):
-            logger.info(f"Converting {i}/{len(files)}: {file.name}")
-            output_file = output_path / f"{file.stem}.pdf"
-            success = self.convert(str(file), str(output_file))
-            results.append(success)
+        pending_files = [files[i] for i in pending]
+        pending_outputs = [output_files[i] for i in pending]
+        batched = None
+        
+        if not pending:
+            batched = []
+        elif method == 'python':
+            # Keep one renderer alive for the whole batch
+            batched = self._convert_with_python_batch(pending_files, pending_outputs,
+                                                      max_workers=max_workers)
+        elif self._can_batch_with_pandoc(pending_files):
+            # One pandoc run for the whole batch when the output can be split per document
+            batched = self._batch_convert_with_pandoc(pending_files, pending_outputs, max_workers)
+        
+        if batched is not None:
+            for i, success in zip(pending, batched):
+                results[i] = success
+        else:
+            # Conversions are subprocess-bound, so threads give real concurrency
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self.convert, str(files[i]), str(output_files[i]),
+                                    method=method, force=True): i
+                    for i in pending
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        results[i] = False
+                        logger.error("Conversion of %s failed: %s", files[i].name, e)
+                    logger.info("Converted %s/%s: %s", done, len(pending), files[i].name)
         
         successful = sum(results)
-        logger.info(f"Batch conversion complete: {successful}/{len(files)} successful")
+        logger.info("Batch conversion complete: %s/%s successful", successful, len(files))
         
         return results
     
-    def cleanup(self):
-        """Clean up temporary files"""
+    def _ensure_dir(self, directory: Path) -> None:
+        """Create directory once per generator; batch outputs share one parent"""
+        if directory not in self._ensured_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(directory)
+    
+    def _is_up_to_date(self, input_path: Path, output_path: Path,
+                       css_file: Optional[str] = None) -> bool:
+        """Whether output_path is newer than its input, stylesheet and config file"""
         try:
-            shutil.rmtree(self.temp_dir)
-        except Exception as e:
-            logger.warning(f"Could not clean up temp directory: {e}")
+            output_mtime = output_path.stat().st_mtime
+        except OSError:
+            return False
+        
+        for source in (input_path, css_file, self._config_path):
+            if source is None:
+                continue
+            try:
+                if os.stat(source).st_mtime > output_mtime:
+                    return False
+            except OSError:
+                continue
+        return True
+    
+    def _can_batch_with_pandoc(self, files: List[Path]) -> bool:
+        """Whether files can be rendered in one pandoc run and split afterwards"""
+        # A shared TOC or section numbering would leak across documents
+        return (len(files) > 1
+                and self.available_tools['pandoc']
+                and self.available_tools['wkhtmltopdf']
+                and not self.config.toc
+                and not self.config.number_sections
+                and all(_is_markdown(f) for f in files))
+    
+    def cleanup(self):
+        """Clean up temporary files (safe to call more than once)"""
+        self._finalizer()
 
 
 def main():
@@ -472,6 +1031,12 @@ def main():
     parser.add_argument('--method', choices=['pandoc', 'python'], help='Force specific method')
     parser.add_argument('--batch', action='store_true', help='Batch convert directory')
     parser.add_argument('--pattern', default='*.md', help='File pattern for batch mode')
+    parser.add_argument('--merge', action='store_true',
+                        help='In batch mode, combine all inputs into the single output PDF')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help='Parallel conversions in batch mode (default: CPU count)')
+    parser.add_argument('--force', action='store_true',
+                        help='Convert even if the output PDF is newer than its sources')
     parser.add_argument('--check', action='store_true', help='Check available tools and exit')
     
     args = parser.parse_args()
@@ -488,14 +1053,24 @@ def main():
             print(f"{status} {tool}")
         sys.exit(0)
     
+    # Merged batch conversion
+    if args.batch and args.merge:
+        files = sorted(str(f) for f in _list_files(Path(args.input), args.pattern))
+        success = bool(files) and generator.merge_convert(files, args.output, css_file=args.css)
+        generator.cleanup()
+        sys.exit(0 if success else 1)
+    
     # Batch conversion
     if args.batch:
-        results = generator.batch_convert(args.input, args.output, args.pattern)
+        results = generator.batch_convert(args.input, args.output, args.pattern,
+                                          max_workers=args.jobs, method=args.method,
+                                          force=args.force)
         generator.cleanup()
         sys.exit(0 if all(results) else 1)
     
     # Single file conversion
-    success = generator.convert(args.input, args.output, css_file=args.css, method=args.method)
+    success = generator.convert(args.input, args.output, css_file=args.css, method=args.method,
+                                force=args.force)
     generator.cleanup()
     sys.exit(0 if success else 1)
 
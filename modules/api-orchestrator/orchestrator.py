@@ -5,35 +5,147 @@ Coordinates between voice input, Claude API planning, and Claude Code execution
 """
 
 import json
+import argparse
+import atexit
+import hashlib
+import importlib.util
+import queue
+import re
+import secrets
+import shlex
 import subprocess
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
 import time
 import os
 
-# Check for anthropic module
+# Claude Assistant locations, resolved once
+CLAUDE_HOME = Path.home() / '.claude'
+CONFIG_PATH = CLAUDE_HOME / 'config' / 'api_key.json'
+SESSION_DIR = CLAUDE_HOME / 'orchestrated-sessions'
+VOICE_SCRIPTS = (
+    CLAUDE_HOME / 'voice_claude_direct.py',
+    CLAUDE_HOME / 'modules' / 'voice-assistant' / 'voice_claude_direct.py'
+)
+
+def _require_anthropic():
+    """Import the anthropic SDK on first use so --help stays fast"""
+    try:
+        import anthropic
+        return anthropic
+    except ImportError:
+        print("❌ Error: anthropic module not found!")
+        print("\nTo install it, run:")
+        print("  pip3 install anthropic --user --break-system-packages")
+        print("\nOr if you have pipx:")
+        print("  pipx install anthropic")
+        print("\nFor more information, see the README.md")
+        sys.exit(1)
+
 try:
-    import anthropic
+    import orjson
+    _json_loads = orjson.loads
+    def _json_dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    def _json_encode_to(f, obj):
+        # Compact bytes straight to the file, no intermediate str
+        f.write(orjson.dumps(obj))
 except ImportError:
-    print("❌ Error: anthropic module not found!")
-    print("\nTo install it, run:")
-    print("  pip3 install anthropic --user --break-system-packages")
-    print("\nOr if you have pipx:")
-    print("  pipx install anthropic")
-    print("\nFor more information, see the README.md")
-    sys.exit(1)
+    _json_loads = json.loads
+    def _json_dumps(obj):
+        return json.dumps(obj, indent=2)
+    def _json_encode_to(f, obj):
+        # Stream encoder chunks instead of building the whole document
+        for chunk in json.JSONEncoder().iterencode(obj):
+            f.write(chunk.encode())
+
+def _json_write(path, obj):
+    """Write obj as JSON atomically: temp file in the same dir, then os.replace"""
+    tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+    with open(tmp, 'wb') as f:
+        _json_encode_to(f, obj)
+    os.replace(tmp, path)
+
+# Shell syntax (pipes, redirects, globs, expansions, env prefixes, comments) that needs /bin/sh
+_SHELL_SYNTAX_RE = re.compile(r'[|&;<>()$`*?~!{}\[\]\n]|^\s*\w+=|(?:^|\s)#')
+
+# Pulls the outermost JSON object out of a response that has extra text around it
+_JSON_EXTRACT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+SYSTEM_PROMPT = """You are helping orchestrate a Claude Code session. 
+                
+                When given planning requirements, respond with a JSON structure:
+                {
+                    "phase": "planning|execution|verification|complete",
+                    "tasks": [
+                        {
+                            "type": "claude_code_prompt|file_creation|command",
+                            "content": "the actual prompt or file content",
+                            "filename": "optional filename if creating a file",
+                            "description": "what this task does",
+                            "parallel_safe": false
+                        }
+                    ],
+                    "checkpoint": true/false,
+                    "summary": "brief summary of what's being done",
+                    "next_action": "what should happen next",
+                    "success_criteria": "how to know if this succeeded"
+                }
+                
+                Guidelines:
+                - Break complex tasks into smaller, executable steps
+                - Use claude_code_prompt for tasks requiring Claude Code
+                - Use file_creation for creating config/data files
+                - Use command for shell commands like testing or running scripts
+                - Tasks run in the order given; set parallel_safe:true only on file_creation or
+                  command tasks that do not depend on each other, and adjacent ones will run together
+                - Set checkpoint:true at major milestones for user review
+                - In verification phase, check outputs and provide fixes if needed
+                - Set phase:complete only when all requirements are fully met
+                
+                IMPORTANT: Your entire response must be valid JSON only. No markdown, no explanations outside JSON."""
+
+# Shortest prefix the API will cache (Sonnet/Opus; Haiku needs 2048)
+_MIN_CACHE_TOKENS = 1024
+
+# Short prompt for routed feedback turns; the conversation already shows the format
+ROUTED_SYSTEM_PROMPT = """Respond with JSON only: {phase, tasks, checkpoint, summary, next_action}, same format as before."""
 
 class ClaudeOrchestrator:
-    def __init__(self, model=None):
-        self.client = anthropic.Anthropic(
+    def __init__(self, model=None, batch_mode=False, use_cache=False, cache_ttl=7 * 24 * 3600):
+        self.client = _require_anthropic().Anthropic(
             api_key=self.load_api_key()
         )
-        self.session_dir = Path.home() / '.claude' / 'orchestrated-sessions'
+        self.session_dir = SESSION_DIR
         self.session_dir.mkdir(parents=True, exist_ok=True)
         self.conversation_history = []
+        self.history_budget_tokens = 8000
+        self._next_ok_at = 0.0  # time.monotonic() before which the next call would be rate limited
+        self._task_handlers = {
+            'claude_code_prompt': self._run_prompt_task,
+            'file_creation': self._create_file_task,
+            'command': self._run_command_task
+        }
+        self.debug_prompts = False  # Keep a copy of each Claude Code prompt in session_dir
+        
+        # Persistent Claude Code process, started on the first prompt task
+        self._cc = None
+        self._cc_lines = None
+        self._cc_session_id = str(uuid.uuid4())
+        
+        # Voice module loaded in-process on first use (keeps its calibrated mic)
+        self._voice_mod = None
+        self._voice = None
         self.current_session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.session_log_file = self.session_dir / f"session_{self.current_session_id}.log"
+        # One buffered handle for the session; flushed on errors and at exit
+        self._log_fh = open(self.session_log_file, 'a', buffering=8192)
+        self._log_lock = threading.Lock()
+        atexit.register(self._log_fh.close)
         
         # Model selection with Claude Opus 4.1 as default
         self.available_models = {
@@ -43,6 +155,19 @@ class ClaudeOrchestrator:
             "sonnet-new": "claude-3-5-sonnet-20241022",
             "haiku": "claude-3-haiku-20240307"
         }
+        # Reverse lookup for get_model_name; the first alias of a shared ID wins
+        self._model_id_to_name = {v: k for k, v in reversed(list(self.available_models.items()))}
+        
+        # Route API calls through the Message Batches API (non-interactive runs)
+        self.batch_mode = batch_mode
+        
+        # Exact-match response cache, evicted by mtime after cache_ttl seconds.
+        # Opt-in: a hit replays the whole plan, file writes and commands included
+        self.use_cache = use_cache
+        self.cache_ttl = cache_ttl
+        self.cache_dir = self.session_dir / 'cache'
+        if self.use_cache:
+            self.cache_dir.mkdir(exist_ok=True)
         
         # Set default model to Opus 4.1
         self.current_model = model if model else self.available_models["opus-4.1"]
@@ -58,7 +183,7 @@ class ClaudeOrchestrator:
             return os.environ['ANTHROPIC_API_KEY']
             
         # Then check Claude Assistant config
-        config_path = Path.home() / '.claude' / 'config' / 'api_key.json'
+        config_path = CONFIG_PATH
         if config_path.exists():
             with open(config_path) as f:
                 data = json.load(f)
@@ -73,8 +198,7 @@ class ClaudeOrchestrator:
         key = input("API Key: ").strip()
         if key:
             config_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(config_path, 'w') as f:
-                json.dump({'anthropic_api_key': key}, f)
+            _json_write(config_path, {'anthropic_api_key': key})
             print("✅ API key saved to config")
             return key
         else:
@@ -82,7 +206,7 @@ class ClaudeOrchestrator:
     
     def log(self, message, level="INFO"):
         """Log messages to both console and file"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = time.strftime("%H:%M:%S")
         log_entry = f"[{timestamp}] {level}: {message}"
         
         # Console output with colors
@@ -95,9 +219,11 @@ class ClaudeOrchestrator:
         else:
             print(f"ℹ️  {message}")
         
-        # File output
-        with open(self.session_log_file, 'a') as f:
-            f.write(log_entry + "\n")
+        # File output (tasks may log from worker threads)
+        with self._log_lock:
+            self._log_fh.write(log_entry + "\n")
+            if level == "ERROR":
+                self._log_fh.flush()
     
     def select_model(self):
         """Interactive model selection"""
@@ -129,10 +255,8 @@ class ClaudeOrchestrator:
     
     def get_model_name(self):
         """Get friendly name for current model"""
-        for name, id in self.available_models.items():
-            if id == self.current_model:
-                return f"{name.upper()} ({id})"
-        return self.current_model
+        name = self._model_id_to_name.get(self.current_model)
+        return f"{name.upper()} ({self.current_model})" if name else self.current_model
     
     def capture_voice_input(self):
         """Use existing voice module to get input"""
@@ -152,8 +276,8 @@ class ClaudeOrchestrator:
         
         if is_wsl:
             # WSL-specific voice handling
-            voice_script_wsl_real = Path.home() / '.claude' / 'voice_claude_wsl_real.py'
-            voice_script_wsl_text = Path.home() / '.claude' / 'voice_claude_wsl.py'
+            voice_script_wsl_real = CLAUDE_HOME / 'voice_claude_wsl_real.py'
+            voice_script_wsl_text = CLAUDE_HOME / 'voice_claude_wsl.py'
             
             # Check if PulseAudio is available and connected
             pulse_connected = False
@@ -188,19 +312,13 @@ class ClaudeOrchestrator:
                 self.log("Using text-based voice interface (WSL)", "INFO")
             else:
                 # Try regular voice scripts
-                for script_path in [
-                    Path.home() / '.claude' / 'voice_claude_direct.py',
-                    Path.home() / '.claude' / 'modules' / 'voice-assistant' / 'voice_claude_direct.py'
-                ]:
+                for script_path in VOICE_SCRIPTS:
                     if script_path.exists():
                         voice_script = script_path
                         break
         else:
             # Non-WSL: Use regular voice module
-            for script_path in [
-                Path.home() / '.claude' / 'voice_claude_direct.py',
-                Path.home() / '.claude' / 'modules' / 'voice-assistant' / 'voice_claude_direct.py'
-            ]:
+            for script_path in VOICE_SCRIPTS:
                 if script_path.exists():
                     voice_script = script_path
                     break
@@ -211,6 +329,22 @@ class ClaudeOrchestrator:
             self.log("Voice module not found, using text input", "WARNING")
             return input("📝 Enter your requirements: ")
         
+        # Reuse the voice module in-process when it exposes the direct class
+        try:
+            voice_text = self._capture_in_process(voice_script)
+            if voice_text is not None:
+                if voice_text:
+                    self.log(f"Captured: {voice_text[:100]}...", "SUCCESS")
+                    return voice_text
+                self.log("Voice capture failed, using text input", "WARNING")
+                return input("📝 Enter your requirements: ")
+        except subprocess.TimeoutExpired:
+            self.log("Voice input timeout", "WARNING")
+            return input("📝 Enter your requirements: ")
+        except Exception as e:
+            self.log(f"In-process voice capture unavailable ({e}), using subprocess", "WARNING")
+            self._voice_mod = self._voice = None
+        
         try:
             result = subprocess.run(
                 ['python3', str(voice_script)],
@@ -235,56 +369,127 @@ class ClaudeOrchestrator:
             self.log(f"Voice capture error: {e}", "ERROR")
             return input("📝 Enter your requirements: ")
     
-    def send_to_claude_api(self, message, include_history=True):
+    def _capture_in_process(self, voice_script, timeout=60):
+        """Capture one phrase via the imported voice module; None if it can't be used"""
+        # Only the direct module is import-safe; the WSL scripts run on import
+        if voice_script.name != 'voice_claude_direct.py':
+            return None
+        if self._voice_mod is None or self._voice_mod.__file__ != str(voice_script):
+            # The script imports voice_common from its own directory
+            script_dir = str(voice_script.parent)
+            if script_dir not in sys.path:
+                sys.path.insert(0, script_dir)
+            spec = importlib.util.spec_from_file_location('voice_claude_direct', voice_script)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self._voice_mod, self._voice = module, None
+        
+        if not hasattr(self._voice_mod, 'VoiceToClaudeDirect'):
+            return None
+        if self._voice is None:
+            self._voice = self._voice_mod.VoiceToClaudeDirect()
+        
+        # Same limit as the subprocess path; a daemon thread so a hung capture
+        # can't keep the process from exiting
+        outcome = {}
+        def capture(voice):
+            try:
+                outcome['text'] = voice.run_single()
+            except Exception as e:
+                outcome['error'] = e
+        worker = threading.Thread(target=capture, args=(self._voice,), daemon=True)
+        worker.start()
+        worker.join(timeout)
+        if worker.is_alive():
+            # The stuck capture holds the microphone; start over on the next turn
+            self._voice_mod = self._voice = None
+            raise subprocess.TimeoutExpired('voice_claude_direct', timeout)
+        if 'error' in outcome:
+            raise outcome['error']
+        return (outcome.get('text') or '').strip()
+    
+    def _route_model(self, message, task_results):
+        """Pick the model for a turn: Haiku when every task succeeded, else current"""
+        if task_results and all(t['success'] for t in task_results):
+            return self.available_models["haiku"]
+        return self.current_model
+    
+    def _cache_path(self, model, system, messages):
+        """Cache file for an exact (model, system, messages) request"""
+        key = hashlib.blake2b((model + system + json.dumps(messages)).encode()).hexdigest()
+        return self.cache_dir / f"{key}.json"
+    
+    def _read_cache(self, cache_file):
+        """Return the cached response text, or None if missing or expired"""
+        try:
+            if time.time() - cache_file.stat().st_mtime > self.cache_ttl:
+                cache_file.unlink()
+                return None
+            with open(cache_file) as f:
+                return json.load(f)['response']
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def _update_rate_limit(self, headers):
+        """Work out how long to wait before the next call from the rate-limit headers"""
+        wait = 0.0
+        try:
+            if 'retry-after' in headers:
+                wait = float(headers['retry-after'])
+            elif headers.get('anthropic-ratelimit-requests-remaining') == '0':
+                reset = headers['anthropic-ratelimit-requests-reset'].replace('Z', '+00:00')
+                wait = (datetime.fromisoformat(reset) - datetime.now(timezone.utc)).total_seconds()
+        except (KeyError, ValueError):
+            wait = 1.0  # Unparseable headers; keep the old fixed pause
+        self._next_ok_at = time.monotonic() + max(0.0, wait)
+    
+    def _summarize_results(self, task_results):
+        """Compact one-line digest of task results for the next prompt"""
+        failures = [f"{t['task']} ({(t.get('error') or '')[:200]})"
+                    for t in task_results if not t['success']][:5]
+        ok = sum(1 for t in task_results if t['success'])
+        return f"{ok}/{len(task_results)} ok; failures: {failures}"
+    
+    def send_to_claude_api(self, message, include_history=True, model_override=None):
         """Send message to Claude API with conversation context"""
-        self.log("Sending to Claude API...", "INFO")
+        model = model_override or self.current_model
+        system = SYSTEM_PROMPT if model == self.current_model else ROUTED_SYSTEM_PROMPT
+        self.log(f"Sending to Claude API ({model})...", "INFO")
         
         # Build messages array with full context
         messages = self.conversation_history.copy() if include_history else []
+        # The history is the stable prefix of the next same-model turn; mark its end
+        # for prompt caching once it is past the API's minimum cacheable length
+        if messages and sum(len(m['content']) for m in messages) // 4 >= _MIN_CACHE_TOKENS:
+            last = messages[-1]
+            messages[-1] = {
+                "role": last['role'],
+                "content": [{"type": "text", "text": last['content'], "cache_control": {"type": "ephemeral"}}]
+            }
         messages.append({
             "role": "user",
             "content": message
         })
         
         try:
-            # Make API call with structured output request
-            response = self.client.messages.create(
-                model=self.current_model,
-                max_tokens=4000,
-                messages=messages,
-                system="""You are helping orchestrate a Claude Code session. 
-                
-                When given planning requirements, respond with a JSON structure:
-                {
-                    "phase": "planning|execution|verification|complete",
-                    "tasks": [
-                        {
-                            "type": "claude_code_prompt|file_creation|command",
-                            "content": "the actual prompt or file content",
-                            "filename": "optional filename if creating a file",
-                            "description": "what this task does"
-                        }
-                    ],
-                    "checkpoint": true/false,
-                    "summary": "brief summary of what's being done",
-                    "next_action": "what should happen next",
-                    "success_criteria": "how to know if this succeeded"
-                }
-                
-                Guidelines:
-                - Break complex tasks into smaller, executable steps
-                - Use claude_code_prompt for tasks requiring Claude Code
-                - Use file_creation for creating config/data files
-                - Use command for shell commands like testing or running scripts
-                - Set checkpoint:true at major milestones for user review
-                - In verification phase, check outputs and provide fixes if needed
-                - Set phase:complete only when all requirements are fully met
-                
-                IMPORTANT: Your entire response must be valid JSON only. No markdown, no explanations outside JSON."""
-            )
+            cache_file = self._cache_path(model, system, messages) if self.use_cache else None
+            response_text = self._read_cache(cache_file) if cache_file else None
             
-            # Parse response
-            response_text = response.content[0].text
+            if response_text is not None:
+                self.log("Using cached Claude API response", "INFO")
+            # Make API call with structured output request
+            elif self.batch_mode:
+                response_text = self._create_message_batched(messages, model, system)
+            else:
+                # Stream the response so text is consumed as it arrives
+                with self.client.messages.stream(
+                    model=model,
+                    max_tokens=4000,
+                    messages=messages,
+                    system=system
+                ) as stream:
+                    response_text = "".join(stream.text_stream)
+                    self._update_rate_limit(stream.response.headers)
             
             # Update conversation history
             self.conversation_history.append(messages[-1])
@@ -292,20 +497,26 @@ class ClaudeOrchestrator:
                 "role": "assistant",
                 "content": response_text
             })
+            self._compact_history()
+            
+            # Only responses that parse are cached; the fallback below is not a plan
+            def cache(parsed):
+                if cache_file and not cache_file.exists():
+                    _json_write(cache_file, {"model": model, "response": response_text})
+                return parsed
             
             # Try to parse as JSON
             try:
-                parsed = json.loads(response_text)
+                parsed = _json_loads(response_text)
                 self.log("Claude API response parsed successfully", "SUCCESS")
-                return parsed
+                return cache(parsed)
             except json.JSONDecodeError as e:
                 self.log(f"JSON parse error: {e}", "ERROR")
                 # Try to extract JSON from response
-                import re
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+                json_match = _JSON_EXTRACT_RE.search(response_text)
                 if json_match:
                     try:
-                        return json.loads(json_match.group())
+                        return cache(_json_loads(json_match.group()))
                     except:
                         pass
                 
@@ -327,102 +538,323 @@ class ClaudeOrchestrator:
                 "checkpoint": True
             }
     
+    def _compact_history(self):
+        """Replace the oldest half of the history with a summary once it exceeds the budget"""
+        # Cheap estimate: ~4 characters per token
+        estimated = sum(len(m['content']) for m in self.conversation_history) // 4
+        if estimated <= self.history_budget_tokens:
+            return
+        
+        # Cut on a user/assistant boundary so roles keep alternating
+        cut = (len(self.conversation_history) // 2) & ~1
+        if cut < 2:
+            return
+        oldest = self.conversation_history[:cut]
+        transcript = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in oldest)
+        
+        try:
+            response = self.client.messages.create(
+                model=self.available_models["haiku"],
+                max_tokens=500,
+                messages=[{
+                    "role": "user",
+                    "content": "Summarize the following turns in <300 tokens preserving phase/tasks/decisions:\n\n" + transcript
+                }]
+            )
+        except Exception as e:
+            self.log(f"History summarization failed: {e}", "WARNING")
+            return
+        
+        self.conversation_history[:cut] = [
+            {"role": "user", "content": "Summarize our earlier turns."},
+            {"role": "assistant", "content": "[SUMMARY] " + response.content[0].text}
+        ]
+        self.log(f"Summarized {cut} history entries (~{estimated} tokens)", "INFO")
+    
+    def _create_message_batched(self, messages, model, system):
+        """Send one request through the Message Batches API and wait for it"""
+        batch = self.client.messages.batches.create(requests=[{
+            "custom_id": f"{self.current_session_id}-{len(self.conversation_history)}",
+            "params": {
+                "model": model,
+                "max_tokens": 4000,
+                "messages": messages,
+                "system": system
+            }
+        }])
+        self.log(f"Submitted batch {batch.id}, waiting for results...", "INFO")
+        
+        # Batches are processed asynchronously; back off while polling
+        delay = 2
+        while batch.processing_status != "ended":
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+            batch = self.client.messages.batches.retrieve(batch.id)
+        
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                return entry.result.message.content[0].text
+            raise RuntimeError(f"Batch request {entry.result.type}")
+        raise RuntimeError("Batch returned no results")
+    
+    def _start_claude_process(self):
+        """Start a long-lived Claude Code process speaking stream-json"""
+        self._cc = subprocess.Popen(
+            ['claude', '-p', '--input-format', 'stream-json', '--output-format', 'stream-json',
+             '--verbose', '--session-id', self._cc_session_id, '--dangerously-skip-permissions'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=1,
+            text=True,
+            cwd=str(Path.cwd())
+        )
+        
+        # Read frames on a thread so a stalled process can still time out
+        self._cc_lines = queue.Queue()
+        def pump(stdout, lines):
+            for line in stdout:
+                lines.put(line)
+            lines.put(None)
+        threading.Thread(target=pump, args=(self._cc.stdout, self._cc_lines), daemon=True).start()
+        atexit.register(self._stop_claude_process)
+        self.log(f"Started Claude Code session {self._cc_session_id}", "INFO")
+    
+    def _stop_claude_process(self):
+        """Terminate the persistent Claude Code process if it is running"""
+        if self._cc and self._cc.poll() is None:
+            self._cc.terminate()
+            try:
+                self._cc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._cc.kill()
+        self._cc = None
+    
+    def _run_claude_prompt(self, prompt, timeout=120):
+        """Send a prompt to the persistent process and wait for its result frame"""
+        if self._cc is None or self._cc.poll() is not None:
+            self._start_claude_process()
+        
+        self._cc.stdin.write(json.dumps({
+            "type": "user",
+            "message": {"role": "user", "content": prompt}
+        }) + "\n")
+        self._cc.stdin.flush()
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                line = self._cc_lines.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                # Kill it so the next prompt starts clean
+                self._stop_claude_process()
+                raise subprocess.TimeoutExpired('claude', timeout)
+            if line is None:
+                raise BrokenPipeError("Claude Code process exited")
+            try:
+                frame = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if frame.get('type') == 'result':
+                return frame
+    
+    def _run_capped(self, args, timeout, input=None, shell=False, limit=1000, err_limit=500):
+        """Run a command, keeping only the first limit/err_limit chars of its output"""
+        proc = subprocess.Popen(
+            args,
+            shell=shell,
+            stdin=subprocess.PIPE if input is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=65536,
+            text=True,
+            cwd=str(Path.cwd())
+        )
+        
+        # Drain both pipes so the child never blocks, but only keep the head
+        def drain(stream, keep, cap):
+            kept = 0
+            for chunk in iter(lambda: stream.read(65536), ''):
+                if kept < cap:
+                    keep.append(chunk[:cap - kept])
+                    kept += len(keep[-1])
+            stream.close()
+        
+        out, err = [], []
+        readers = [
+            threading.Thread(target=drain, args=(proc.stdout, out, limit), daemon=True),
+            threading.Thread(target=drain, args=(proc.stderr, err, err_limit), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        
+        if input is not None:
+            try:
+                proc.stdin.write(input)
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            for reader in readers:
+                reader.join(1)
+        return proc.returncode, ''.join(out), ''.join(err)
+    
+    def _execute_tasks(self, tasks):
+        """Run tasks in plan order; each run of adjacent parallel_safe tasks overlaps"""
+        def parallel(task):
+            # claude_code_prompt stays serial: one persistent process, working in cwd
+            return task.get('parallel_safe', False) and task.get('type') != 'claude_code_prompt'
+        
+        results = []
+        i = 0
+        while i < len(tasks):
+            j = i
+            while j < len(tasks) and parallel(tasks[j]):
+                j += 1
+            if j - i > 1:
+                # The whole group finishes before the next task starts
+                with ThreadPoolExecutor(max_workers=min(8, j - i)) as ex:
+                    results.extend(ex.map(self.execute_claude_code_task, tasks[i:j]))
+            else:
+                j = i + 1
+                results.append(self.execute_claude_code_task(tasks[i]))
+            i = j
+        return results
+    
     def execute_claude_code_task(self, task):
         """Execute a single Claude Code task"""
         self.log(f"Executing: {task.get('description', 'task')}", "INFO")
         
         task_type = task.get('type', 'unknown')
-        
-        if task_type == 'claude_code_prompt':
-            # Save prompt to file for reference
-            prompt_file = self.session_dir / f"prompt_{datetime.now().timestamp():.0f}.txt"
+        handler = self._task_handlers.get(task_type)
+        if handler is None:
+            return {
+                "success": False,
+                "output": "",
+                "error": f"Unknown task type: {task_type}"
+            }
+        return handler(task)
+    
+    def _run_prompt_task(self, task):
+        """Run a claude_code_prompt task"""
+        # Save prompt to file for reference
+        if self.debug_prompts:
+            prompt_file = self.session_dir / f"prompt_{time.time_ns()}_{secrets.token_hex(3)}.txt"
             prompt_file.write_text(task['content'])
+        
+        # Execute with the persistent Claude Code process
+        try:
+            frame = self._run_claude_prompt(task['content'])
+            return {
+                "success": not frame.get('is_error', False),
+                "output": str(frame.get('result', ''))[:1000],  # Limit output size
+                "error": frame.get('subtype') if frame.get('is_error') else None
+            }
+        except subprocess.TimeoutExpired:
+            return {
+                "success": False,
+                "output": "",
+                "error": "Command timed out after 2 minutes"
+            }
+        except (OSError, ValueError) as e:
+            # Process missing or died; fall back to a one-shot run
+            self.log(f"Persistent Claude Code unavailable ({e}), using one-shot run", "WARNING")
+            self._stop_claude_process()
+        
+        # Execute with Claude Code, prompt on stdin
+        try:
+            returncode, stdout, stderr = self._run_capped(
+                ['claude-code'],
+                timeout=120,  # 2 minute timeout
+                input=task['content']
+            )
             
-            # Execute with Claude Code using pipe
-            try:
-                # Use echo to pipe the prompt to claude-code
-                result = subprocess.run(
-                    f'echo "{task["content"]}" | claude-code',
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    cwd=str(Path.cwd()),
-                    timeout=120  # 2 minute timeout
-                )
-                
-                return {
-                    "success": result.returncode == 0,
-                    "output": result.stdout[:1000],  # Limit output size
-                    "error": result.stderr[:500] if result.stderr else None
-                }
-            except subprocess.TimeoutExpired:
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": "Command timed out after 2 minutes"
-                }
-            except Exception as e:
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": str(e)
-                }
-            
-        elif task_type == 'file_creation':
-            # Create file directly
-            try:
-                filename = task.get('filename', f'file_{datetime.now().timestamp():.0f}.txt')
-                # Create in current directory, not session directory
-                file_path = Path.cwd() / filename
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(task['content'])
-                
-                return {
-                    "success": True,
-                    "output": f"Created {filename}",
-                    "error": None
-                }
-            except Exception as e:
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": str(e)
-                }
+            return {
+                "success": returncode == 0,
+                "output": stdout,
+                "error": stderr if stderr else None
+            }
+        except subprocess.TimeoutExpired:
+            return {
+                "success": False,
+                "output": "",
+                "error": "Command timed out after 2 minutes"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "output": "",
+                "error": str(e)
+            }
+    
+    def _create_file_task(self, task):
+        """Run a file_creation task"""
+        # Create file directly
+        try:
+            filename = task.get('filename', f'file_{time.time_ns()}_{secrets.token_hex(3)}.txt')
+            # Create in current directory, not session directory
+            file_path = Path.cwd() / filename
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(task['content'])
             
-        elif task_type == 'command':
-            # Execute shell command
-            try:
-                result = subprocess.run(
+            return {
+                "success": True,
+                "output": f"Created {filename}",
+                "error": None
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "output": "",
+                "error": str(e)
+            }
+    
+    def _run_command_task(self, task):
+        """Run a command task"""
+        # Execute shell command
+        try:
+            # Exec simple commands directly; only shell syntax pays for /bin/sh
+            argv = None
+            if not _SHELL_SYNTAX_RE.search(task['content']):
+                try:
+                    argv = shlex.split(task['content'])
+                except ValueError:
+                    pass
+            if argv:
+                try:
+                    returncode, stdout, stderr = self._run_capped(argv, timeout=60)
+                except FileNotFoundError:
+                    # Not an executable on PATH (e.g. a shell builtin)
+                    argv = None
+            if not argv:
+                returncode, stdout, stderr = self._run_capped(
                     task['content'],
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    cwd=str(Path.cwd()),
-                    timeout=60  # 1 minute timeout
+                    timeout=60,  # 1 minute timeout
+                    shell=True
                 )
-                return {
-                    "success": result.returncode == 0,
-                    "output": result.stdout[:1000],
-                    "error": result.stderr[:500] if result.stderr else None
-                }
-            except subprocess.TimeoutExpired:
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": "Command timed out"
-                }
-            except Exception as e:
-                return {
-                    "success": False,
-                    "output": "",
-                    "error": str(e)
-                }
-        
-        else:
+            return {
+                "success": returncode == 0,
+                "output": stdout,
+                "error": stderr if stderr else None
+            }
+        except subprocess.TimeoutExpired:
             return {
                 "success": False,
                 "output": "",
-                "error": f"Unknown task type: {task_type}"
+                "error": "Command timed out"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "output": "",
+                "error": str(e)
             }
     
     def run_orchestrated_session(self, initial_input=None):
@@ -483,10 +915,13 @@ Then provide executable tasks for Claude Code."""
             # Execute tasks
             task_results = []
             if response.get('tasks'):
-                print(f"\n📝 Executing {len(response['tasks'])} tasks:")
-                for i, task in enumerate(response['tasks'], 1):
-                    print(f"  [{i}/{len(response['tasks'])}] {task.get('description', 'Task')}")
-                    result = self.execute_claude_code_task(task)
+                tasks = response['tasks']
+                print(f"\n📝 Executing {len(tasks)} tasks:")
+                
+                results = self._execute_tasks(tasks)
+                
+                for i, (task, result) in enumerate(zip(tasks, results), 1):
+                    print(f"  [{i}/{len(tasks)}] {task.get('description', 'Task')}")
                     task_results.append({
                         "task": task.get('description', 'Unknown task'),
                         "type": task.get('type'),
@@ -501,8 +936,8 @@ Then provide executable tasks for Claude Code."""
                     else:
                         self.log(f"Task failed: {result.get('error', 'Unknown error')}", "ERROR")
             
-            # Check for checkpoint
-            if response.get('checkpoint'):
+            # Check for checkpoint (batch runs are non-interactive)
+            if response.get('checkpoint') and not self.batch_mode:
                 print("\n" + "="*60)
                 print("🛑 CHECKPOINT - Review and decide next action")
                 print("="*60)
@@ -524,8 +959,7 @@ Then provide executable tasks for Claude Code."""
                     response = self.send_to_claude_api(
                         f"""User provided new instructions: {new_input}
                         
-Previous task results:
-{json.dumps(task_results, indent=2)}
+Previous task results: {self._summarize_results(task_results)}
 
 Please adjust the plan accordingly and provide next tasks."""
                     )
@@ -535,15 +969,14 @@ Please adjust the plan accordingly and provide next tasks."""
                     response = self.send_to_claude_api(
                         f"""User provided new voice instructions: {new_input}
                         
-Previous task results:
-{json.dumps(task_results, indent=2)}
+Previous task results: {self._summarize_results(task_results)}
 
 Please adjust the plan accordingly and provide next tasks."""
                     )
                     continue
                 elif choice == 'r':
                     print("\n📊 Detailed Results:")
-                    print(json.dumps(task_results, indent=2))
+                    print(_json_dumps(task_results))
                     input("\nPress Enter to continue...")
                 elif choice == 'o':
                     self.select_model()
@@ -555,10 +988,7 @@ Please adjust the plan accordingly and provide next tasks."""
             # Prepare concise feedback
             feedback_message = f"""Task execution results for phase '{response.get('phase')}':
 
-Success rate: {sum(1 for t in task_results if t['success'])}/{len(task_results)} tasks succeeded
-
-Results:
-{json.dumps(task_results, indent=2)}
+Results: {self._summarize_results(task_results)}
 
 Based on these results:
 1. If tasks failed, provide fixes in the next iteration
@@ -566,10 +996,13 @@ Based on these results:
 3. If all requirements are met, set phase to 'complete'
 4. Always provide clear next steps"""
             
-            response = self.send_to_claude_api(feedback_message)
+            response = self.send_to_claude_api(
+                feedback_message,
+                model_override=self._route_model(feedback_message, task_results)
+            )
             
-            # Rate limit protection
-            time.sleep(1)  # Basic rate limiting
+            # Rate limit protection: only wait when the last response said to
+            time.sleep(max(0.0, self._next_ok_at - time.monotonic()))
         
         if iteration >= max_iterations:
             self.log(f"Max iterations ({max_iterations}) reached", "WARNING")
@@ -591,56 +1024,58 @@ Based on these results:
             "files_created": [str(f) for f in self.session_dir.glob(f"*{self.current_session_id}*")]
         }
         
-        with open(summary_file, 'w') as f:
-            json.dump(summary, f, indent=2)
+        _json_write(summary_file, summary)
         
         self.log(f"Session saved to: {summary_file}", "SUCCESS")
+        with self._log_lock:
+            self._log_fh.flush()
         print(f"\n📁 Session files saved in: {self.session_dir}")
         print(f"   - Summary: {summary_file.name}")
         print(f"   - Log: {self.session_log_file.name}")
 
 def main():
     """Main entry point"""
-    model = None
-    initial_input = None
+    parser = argparse.ArgumentParser(
+        prog='orchestrator.py',
+        description="Claude Orchestrator - Automated Claude Code Session Manager",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Models:
+  opus-4.1  - Claude Opus 4.1 (Latest, Default)
+  opus      - Claude 3 Opus
+  sonnet    - Claude 3.5 Sonnet
+  haiku     - Claude 3 Haiku
+
+Examples:
+  orchestrator.py 'Create a Python web scraper'
+  orchestrator.py --model opus-4.1 'Debug my test suite'
+  orchestrator.py --select-model"""
+    )
+    parser.add_argument('--model', help="Select model (opus-4.1, opus, sonnet, haiku)")
+    parser.add_argument('--select-model', action='store_true', help="Interactive model selection")
+    parser.add_argument('--batch', action='store_true',
+                        help="Non-interactive run via the Message Batches API")
+    parser.add_argument('--cache', action='store_true',
+                        help="Replay cached responses to identical requests (replays their tasks too)")
+    parser.add_argument('--cache-ttl', type=int, default=7 * 24 * 3600, metavar='SECS',
+                        help="Expire cached responses after SECS (default 7 days)")
+    parser.add_argument('request', nargs='*', help="Request text (voice input if omitted)")
+    args, _ = parser.parse_known_args()
     
-    # Parse command line arguments
-    i = 1
-    while i < len(sys.argv):
-        arg = sys.argv[i]
-        
-        if arg == '--help':
-            print("Claude Orchestrator - Automated Claude Code Session Manager")
-            print("\nUsage:")
-            print("  orchestrator.py                    - Start with voice input")
-            print("  orchestrator.py 'request'          - Start with text input")
-            print("  orchestrator.py --model MODEL      - Select model (opus-4.1, opus, sonnet, haiku)")
-            print("  orchestrator.py --select-model     - Interactive model selection")
-            print("  orchestrator.py --help             - Show this help")
-            print("\nModels:")
-            print("  opus-4.1  - Claude Opus 4.1 (Latest, Default)")
-            print("  opus      - Claude 3 Opus")
-            print("  sonnet    - Claude 3.5 Sonnet")
-            print("  haiku     - Claude 3 Haiku")
-            print("\nExamples:")
-            print("  orchestrator.py 'Create a Python web scraper'")
-            print("  orchestrator.py --model opus-4.1 'Debug my test suite'")
-            print("  orchestrator.py --select-model")
-            sys.exit(0)
-        elif arg == '--model' and i + 1 < len(sys.argv):
-            model = sys.argv[i + 1]
-            i += 2
-        elif arg == '--select-model':
-            # Will trigger interactive selection
-            model = 'SELECT'
-            i += 1
-        else:
-            # Rest is the input request
-            initial_input = " ".join(sys.argv[i:])
-            break
+    model = 'SELECT' if args.select_model else args.model
+    initial_input = " ".join(args.request) or None
+    batch_mode = args.batch
+    use_cache = args.cache
+    cache_ttl = args.cache_ttl
+    
+    if batch_mode and not initial_input:
+        print("❌ --batch needs the request on the command line")
+        sys.exit(1)
     
     try:
-        orchestrator = ClaudeOrchestrator(model if model != 'SELECT' else None)
+        orchestrator = ClaudeOrchestrator(model if model != 'SELECT' else None,
+                                          batch_mode=batch_mode,
+                                          use_cache=use_cache,
+                                          cache_ttl=cache_ttl)
         
         # Interactive model selection if requested
         if model == 'SELECT':
@@ -6,13 +6,25 @@ Supports: Markdown, HTML, Text, reStructuredText
 """
 
 import os
+import re
 import sys
 import json
+import hashlib
+import time
+import shutil
 import logging
+import fnmatch
 import argparse
+import tempfile
+import functools
+import itertools
 import subprocess
+import importlib.util
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple
+from types import MappingProxyType
+from typing import Any, Optional, Dict, Iterator, List, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -21,12 +33,433 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Rendered Markdown, content-addressed so repeat runs skip markdown2 entirely
+MD_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'claude-pdf'
+# Finished PDFs, keyed by source bytes + config + method, for batch re-runs
+PDF_CACHE_DIR = MD_CACHE_DIR / 'pdf'
+# Kept in a batch output directory: the config each of its PDFs was made with
+CONFIG_STAMP_FILE = '.pdfgen-config.json'
+
+
+# Inputs above this size are rendered in heading-aligned chunks
+_MD_CHUNK_THRESHOLD = 256 * 1024
+_MD_CHUNK_SIZE = 64 * 1024
+_MD_FENCE_RE = re.compile(r'^\s{0,3}(```|~~~)')
+_MD_LINK_DEF_RE = re.compile(r'^\s{0,3}\[(?!\^)[^\]]+\]:\s.*$', re.MULTILINE)
+# Footnotes and links to header IDs also resolve across a joined source
+_MD_CROSS_REF_RE = re.compile(r'\[\^[^\]]+\]|\]\(#')
+
+
+def _split_markdown(content: str) -> List[str]:
+    """Split Markdown into ~_MD_CHUNK_SIZE pieces at top-level headings
+    
+    Cuts only happen before an ATX heading that follows a blank line and is
+    outside a fenced code block, so no block element straddles two chunks.
+    """
+    chunks = []
+    current = []
+    size = 0
+    in_fence = False
+    previous_blank = True
+    for line in content.splitlines(keepends=True):
+        if _MD_FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif (not in_fence and previous_blank and line.startswith('#')
+              and size >= _MD_CHUNK_SIZE):
+            chunks.append(''.join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+        previous_blank = not line.strip()
+    chunks.append(''.join(current))
+    
+    # Reference-style link definitions may be used from any chunk
+    link_defs = '\n'.join(m.group(0) for m in _MD_LINK_DEF_RE.finditer(content))
+    if link_defs and len(chunks) > 1:
+        chunks = [chunk + '\n\n' + link_defs for chunk in chunks]
+    return chunks
+
+
+@functools.lru_cache(maxsize=1)
+def _markdown_backend() -> Tuple[str, Any]:
+    """(identity, render) for the fastest installed Markdown parser
+    
+    cmark-gfm is C and releases the GIL while parsing; it covers the fenced
+    code and tables extras natively. markdown2 is the pure-Python fallback.
+    Raises ImportError if neither is installed.
+    """
+    try:
+        import cmarkgfm
+        from cmarkgfm.cmark import Options
+        
+        def render(text: str, extras: Tuple[str, ...]) -> str:
+            # UNSAFE keeps raw HTML, as markdown2 does
+            return cmarkgfm.github_flavored_markdown_to_html(text, options=Options.CMARK_OPT_UNSAFE)
+        return f"cmarkgfm-{getattr(cmarkgfm, '__version__', '')}", render
+    except ImportError:
+        import markdown2
+        
+        def render(text: str, extras: Tuple[str, ...]) -> str:
+            return markdown2.markdown(text, extras=list(extras))
+        return f"markdown2-{markdown2.__version__}", render
+
+
+def _md_cache_get(raw: bytes, extras: Tuple[str, ...]) -> str:
+    """Return HTML for raw Markdown, from memory, disk cache, or a fresh render"""
+    backend, _ = _markdown_backend()
+    key = hashlib.sha256(
+        raw + repr((extras, backend)).encode()
+    ).hexdigest()
+    return _render_markdown_cached(key, raw, extras)
+
+
+@functools.lru_cache(maxsize=512)
+def _render_markdown_cached(key: str, raw: bytes, extras: Tuple[str, ...]) -> str:
+    # raw is part of the LRU key, so a hit is verified against the full content
+    cache_file = MD_CACHE_DIR / f"{key}.html"
+    try:
+        return cache_file.read_text(encoding='utf-8')
+    except OSError:
+        pass
+    
+    _, render = _markdown_backend()
+    html = render(raw.decode('utf-8'), extras)
+    
+    try:
+        MD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_file.write_text(html, encoding='utf-8')
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.debug(f"Could not write markdown cache: {e}")
+    return html
+
+
+# Paragraph that separates documents in a batched pandoc run
+_BATCH_TOKEN = "CD985272F78311"
+# pdflatex asks for another pass while labels, longtable widths or bookmarks settle
+_LATEX_RERUN_RE = re.compile(rb'Rerun (?:to get|LaTeX)')
+_LATEX_MAX_RUNS = 3
+
+
+# Backend detection and check_system results, computed once per process and
+# shared by every PDFGenerator (pool workers get theirs via _worker_init)
+_DETECTION_CACHE: Dict[str, Any] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _which(command: str) -> Optional[str]:
+    """PATH lookup, done once per command per process"""
+    return shutil.which(command)
+
+
+def _has_module(name: str) -> bool:
+    """Whether a module is installed, without importing it"""
+    return importlib.util.find_spec(name) is not None
+
+
+@functools.lru_cache(maxsize=1)
+def _import_pypandoc():
+    """Import pypandoc with its format list cached for the life of the process"""
+    import pypandoc
+    # convert_file validates formats by asking pandoc on every call
+    pypandoc.get_pandoc_formats = functools.lru_cache(maxsize=1)(pypandoc.get_pandoc_formats)
+    return pypandoc
+
+
+def _quote_wkhtmltopdf_arg(arg: str) -> str:
+    """Quote an argument for wkhtmltopdf's --read-args-from-stdin parser"""
+    return '"' + arg.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class _WkhtmltopdfWorker:
+    """A long-lived `wkhtmltopdf --read-args-from-stdin` process
+    
+    Each submitted job is one argument line; the process converts them in
+    order and is recycled every `recycle_every` jobs, since long-running
+    wkhtmltopdf processes are known to grow and occasionally wedge. Results
+    are only known after drain(): callers check the output files then.
+    """
+    
+    def __init__(self, recycle_every: int = 50, job_timeout: int = 60):
+        self.recycle_every = recycle_every
+        self.job_timeout = job_timeout
+        self.temp_dir = Path(tempfile.mkdtemp(prefix='pdfgen-wk-'))
+        self._proc = None
+        self._stderr = None
+        self._jobs = 0
+        self._temp_files: List[str] = []
+    
+    def temp_html(self, html_content: str) -> str:
+        """Write HTML for a queued job; removed again when the worker drains"""
+        fd, temp_html = tempfile.mkstemp(suffix='.html', dir=self.temp_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        self._temp_files.append(temp_html)
+        return temp_html
+    
+    def submit(self, args: List[str]) -> None:
+        """Queue one conversion (wkhtmltopdf arguments without the program name)"""
+        if self._proc is None:
+            # stderr goes to a file: a pipe nobody reads could fill and stall it
+            self._stderr = tempfile.TemporaryFile(dir=self.temp_dir)
+            self._proc = subprocess.Popen(
+                ['wkhtmltopdf', '--read-args-from-stdin'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=self._stderr,
+                text=True
+            )
+        self._proc.stdin.write(' '.join(_quote_wkhtmltopdf_arg(a) for a in args) + '\n')
+        self._proc.stdin.flush()
+        self._jobs += 1
+        if self._jobs >= self.recycle_every:
+            self.drain()
+    
+    def drain(self) -> None:
+        """Wait for every queued job to finish and let the process exit"""
+        if self._proc is not None:
+            self._proc.stdin.close()
+            try:
+                self._proc.wait(timeout=self.job_timeout * self._jobs)
+            except subprocess.TimeoutExpired:
+                # Wedged; whatever it did not write is left to the fallback
+                logger.warning(f"wkhtmltopdf did not finish {self._jobs} jobs in time, killing it")
+                self._proc.kill()
+                self._proc.wait()
+            if self._proc.returncode:
+                self._stderr.seek(0)
+                errors = self._stderr.read().decode('utf-8', 'replace').strip()
+                logger.warning(f"wkhtmltopdf exited with {self._proc.returncode}: {errors[-2000:]}")
+            self._stderr.close()
+            self._proc = self._stderr = None
+        for temp_file in self._temp_files:
+            Path(temp_file).unlink(missing_ok=True)
+        self._temp_files = []
+        self._jobs = 0
+    
+    def close(self) -> None:
+        self.drain()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def _pdf_written(output_file: str) -> bool:
+    """Whether a conversion left a non-empty output behind"""
+    try:
+        return Path(output_file).stat().st_size > 0
+    except OSError:
+        return False
+
+
+def _scan_files(root: Path, pattern: str) -> Iterator[Path]:
+    """Yield files under root matching pattern, as they are found
+    
+    Plain name patterns and "**/name" patterns walk with os.scandir, whose
+    entries already know their type, so no per-file stat is needed; any other
+    pattern goes to Path.glob, which is lazy as well.
+    """
+    recursive = pattern.startswith('**/')
+    name_pattern = pattern[3:] if recursive else pattern
+    if '/' in name_pattern or '**' in name_pattern:
+        yield from root.glob(pattern)
+        return
+    
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and fnmatch.fnmatchcase(entry.name, name_pattern):
+                        yield Path(entry.path)
+        except OSError as e:
+            logger.warning(f"Cannot read directory: {e}")
+
+
+@dataclass(frozen=True)
+class OutputCfg:
+    """The "output" config section"""
+    __slots__ = ('paper_size', 'margin', 'font_size', 'font_family', 'orientation')
+    
+    paper_size: str
+    margin: str
+    font_size: str
+    font_family: str
+    orientation: str
+
+
+@dataclass(frozen=True)
+class ProcessingCfg:
+    """The "processing" config section"""
+    __slots__ = ('syntax_highlighting', 'table_of_contents', 'numbered_sections', 'preserve_tabs')
+    
+    syntax_highlighting: bool
+    table_of_contents: bool
+    numbered_sections: bool
+    preserve_tabs: bool
+
+
+@dataclass(frozen=True)
+class PathCfg:
+    """The "paths" config section"""
+    __slots__ = ('custom_css', 'output_dir')
+    
+    custom_css: Optional[str]
+    output_dir: str
+
+
+@dataclass(frozen=True)
+class GeneratorCfg:
+    """Resolved configuration, read by attribute instead of nested dict lookups"""
+    __slots__ = ('output', 'processing', 'paths')
+    
+    output: OutputCfg
+    processing: ProcessingCfg
+    paths: PathCfg
+    
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> 'GeneratorCfg':
+        """Build from the merged JSON-style dict; unknown keys are ignored"""
+        def section(section_cls, name):
+            values = config[name]
+            return section_cls(**{field: values.get(field) for field in section_cls.__slots__})
+        return cls(
+            output=section(OutputCfg, 'output'),
+            processing=section(ProcessingCfg, 'processing'),
+            paths=section(PathCfg, 'paths')
+        )
+
+
+# Per-process generator for batch_convert workers, built once by _worker_init
+_WORKER_GENERATOR = None
+
+
+def _worker_init(config: Dict, available_methods: List[str]) -> None:
+    """Pool initializer: reuse the parent's config and detection results"""
+    global _WORKER_GENERATOR
+    _DETECTION_CACHE.setdefault('methods', tuple(available_methods))
+    _WORKER_GENERATOR = PDFGenerator(config=config, available_methods=available_methods)
+
+
+def _convert_one(job: Tuple[str, str, Optional[str]]) -> bool:
+    """Pool worker: convert one (input, output, method) job"""
+    input_file, output_file, method = job
+    logger.info(f"Converting: {Path(input_file).name}")
+    return _WORKER_GENERATOR.convert(input_file, output_file, method)
+
+
 class PDFGenerator:
     """Multi-backend PDF generator with automatic fallback"""
     
-    def __init__(self, config_file: Optional[str] = None):
-        self.config = self.load_config(config_file)
-        self.available_methods = self.detect_available_methods()
+    def __init__(self, config_file: Optional[str] = None,
+                 config: Optional[Dict] = None,
+                 available_methods: Optional[List[str]] = None):
+        self.config = config if config is not None else self.load_config(config_file)
+        self.cfg = GeneratorCfg.from_dict(self.config)
+        if available_methods is None:
+            available_methods = self.detect_available_methods()
+        self.available_methods = available_methods
+        self._wk_worker = None
+        self._wk_depth = 0
+        self._build_templates()
+    
+    def _build_templates(self) -> None:
+        """Specialize the HTML templates and pdfkit options to the config once"""
+        self._pdfkit_head, self._pdfkit_tail = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <style>
+                body {{
+                    font-family: {self.cfg.output.font_family};
+                    font-size: {self.cfg.output.font_size};
+                    line-height: 1.6;
+                    max-width: 900px;
+                    margin: 0 auto;
+                    padding: 20px;
+                }}
+                code {{
+                    background: #f4f4f4;
+                    padding: 2px 5px;
+                    border-radius: 3px;
+                }}
+                pre {{
+                    background: #f4f4f4;
+                    padding: 10px;
+                    border-radius: 5px;
+                    overflow-x: auto;
+                }}
+                table {{
+                    border-collapse: collapse;
+                    width: 100%;
+                }}
+                th, td {{
+                    border: 1px solid #ddd;
+                    padding: 8px;
+                    text-align: left;
+                }}
+                th {{
+                    background-color: #f2f2f2;
+                }}
+            </style>
+        </head>
+        <body>
+            {{body}}
+        </body>
+        </html>
+        """.split('{body}')
+        
+        self._pdfkit_options = MappingProxyType({
+            'page-size': self.cfg.output.paper_size.capitalize(),
+            'margin-top': self.cfg.output.margin,
+            'margin-right': self.cfg.output.margin,
+            'margin-bottom': self.cfg.output.margin,
+            'margin-left': self.cfg.output.margin,
+            'encoding': 'UTF-8',
+            'no-outline': None
+        })
+        
+        self._weasyprint_head, self._weasyprint_tail = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <style>
+                @page {{
+                    size: {self.cfg.output.paper_size};
+                    margin: {self.cfg.output.margin};
+                }}
+                body {{
+                    font-family: {self.cfg.output.font_family};
+                    font-size: {self.cfg.output.font_size};
+                }}
+            </style>
+        </head>
+        <body>{{body}}</body>
+        </html>
+        """.split('{body}')
+    
+    def __enter__(self) -> 'PDFGenerator':
+        """Route wkhtmltopdf conversions through one persistent process until exit
+        
+        Re-entrant: nested blocks share the outermost block's worker.
+        """
+        if self._wk_depth == 0:
+            self._wk_worker = _WkhtmltopdfWorker()
+        self._wk_depth += 1
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        # Conversions queued on the worker complete here, at every level, so
+        # the code after a nested block can check its outputs
+        self._wk_depth -= 1
+        if self._wk_depth:
+            self._wk_worker.drain()
+            return
+        self._wk_worker.close()
+        self._wk_worker = None
         
     def load_config(self, config_file: Optional[str]) -> Dict:
         """Load configuration from JSON file or use defaults"""
@@ -66,7 +499,9 @@ class PDFGenerator:
         return default_config
     
     def detect_available_methods(self) -> List[str]:
-        """Detect which PDF generation methods are available"""
+        """Detect which PDF generation methods are available (once per process)"""
+        if 'methods' in _DETECTION_CACHE:
+            return list(_DETECTION_CACHE['methods'])
         methods = []
         
         # Check for pandoc
@@ -79,53 +514,34 @@ class PDFGenerator:
             methods.append('wkhtmltopdf')
             logger.info("✓ wkhtmltopdf detected")
         
-        # Check for Python libraries
-        try:
-            import markdown2
-            import pdfkit
+        # Check for Python libraries (find_spec locates them without importing;
+        # the convert_with_* methods import what they need on first use)
+        if (_has_module('markdown2') or _has_module('cmarkgfm')) and _has_module('pdfkit'):
             methods.append('python-pdfkit')
             logger.info("✓ Python pdfkit detected")
-        except ImportError:
-            pass
         
-        try:
-            import md2pdf
+        if _has_module('md2pdf'):
             methods.append('python-md2pdf')
             logger.info("✓ Python md2pdf detected")
-        except ImportError:
-            pass
         
-        try:
-            import pypandoc
+        if _has_module('pypandoc'):
             methods.append('python-pypandoc')
             logger.info("✓ Python pypandoc detected")
-        except ImportError:
-            pass
         
-        try:
-            import weasyprint
+        if _has_module('weasyprint'):
             methods.append('python-weasyprint')
             logger.info("✓ Python weasyprint detected")
-        except ImportError:
-            pass
         
         if not methods:
             logger.warning("⚠ No PDF generation methods available!")
             logger.info("Install one of: pandoc, wkhtmltopdf, or pip install pdfkit md2pdf pypandoc")
         
+        _DETECTION_CACHE['methods'] = tuple(methods)
         return methods
     
     def check_command(self, command: str) -> bool:
         """Check if a command is available in PATH"""
-        try:
-            subprocess.run(
-                ['which', command],
-                capture_output=True,
-                check=True
-            )
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return _which(command) is not None
     
     def convert(self, input_file: str, output_file: str, 
                 method: Optional[str] = None) -> bool:
@@ -157,7 +573,15 @@ class PDFGenerator:
                 if current_method == 'pandoc':
                     return self.convert_with_pandoc(input_file, output_file)
                 elif current_method == 'wkhtmltopdf':
-                    return self.convert_with_wkhtmltopdf(input_file, output_file)
+                    ok = self.convert_with_wkhtmltopdf(input_file, output_file)
+                    if ok is None:
+                        # Queued on the worker; wait so a failure can fall back
+                        self._wk_worker.drain()
+                        if not _pdf_written(output_file):
+                            raise RuntimeError("wkhtmltopdf worker produced no output")
+                        logger.info(f"✓ Successfully created: {output_file}")
+                        ok = True
+                    return ok
                 elif current_method == 'python-pdfkit':
                     return self.convert_with_pdfkit(input_file, output_file)
                 elif current_method == 'python-md2pdf':
@@ -173,6 +597,24 @@ class PDFGenerator:
         logger.error("All conversion methods failed")
         return False
     
+    def _pandoc_options(self) -> List[str]:
+        """Layout and processing flags shared by single and batched pandoc runs"""
+        options = [
+            f'--variable=geometry:{self.cfg.output.margin}',
+            f'--variable=fontsize:{self.cfg.output.font_size}',
+        ]
+        
+        if self.cfg.processing.syntax_highlighting:
+            options.append('--highlight-style=tango')
+        
+        if self.cfg.processing.table_of_contents:
+            options.append('--toc')
+        
+        if self.cfg.processing.numbered_sections:
+            options.append('--number-sections')
+        
+        return options
+    
     def convert_with_pandoc(self, input_file: str, output_file: str) -> bool:
         """Convert using pandoc"""
         try:
@@ -181,18 +623,7 @@ class PDFGenerator:
                 input_file,
                 '-o', output_file,
                 '--pdf-engine=pdflatex',
-                f'--variable=geometry:{self.config["output"]["margin"]}',
-                f'--variable=fontsize:{self.config["output"]["font_size"]}',
-            ]
-            
-            if self.config['processing']['syntax_highlighting']:
-                cmd.append('--highlight-style=tango')
-            
-            if self.config['processing']['table_of_contents']:
-                cmd.append('--toc')
-            
-            if self.config['processing']['numbered_sections']:
-                cmd.append('--number-sections')
+            ] + self._pandoc_options()
             
             subprocess.run(cmd, check=True, capture_output=True)
             logger.info(f"✓ Successfully created: {output_file}")
@@ -202,35 +633,124 @@ class PDFGenerator:
             logger.error(f"Pandoc conversion failed: {e.stderr.decode() if e.stderr else str(e)}")
             return False
     
-    def convert_with_wkhtmltopdf(self, input_file: str, output_file: str) -> bool:
-        """Convert using wkhtmltopdf"""
+    def batch_convert_with_pandoc(self, inputs: List[str], outputs: List[str],
+                                  jobs: Optional[int] = None) -> List[bool]:
+        """Render many Markdown files with one pandoc run, then pdflatex each
+        
+        The inputs are joined with a sentinel paragraph and turned into LaTeX
+        by a single pandoc process; the shared preamble is reused for every
+        document and only the per-document pdflatex runs remain.
+        """
+        sources = [Path(f).read_text(encoding='utf-8') for f in inputs]
+        joined = f"\n\n{_BATCH_TOKEN}\n\n".join(sources)
+        
+        cmd = ['pandoc', '-f', 'markdown', '-t', 'latex', '--standalone'] + self._pandoc_options()
+        result = subprocess.run(cmd, input=joined.encode('utf-8'), capture_output=True, check=True)
+        latex = result.stdout.decode('utf-8')
+        
+        preamble, _, rest = latex.partition('\\begin{document}')
+        body, _, _ = rest.rpartition('\\end{document}')
+        parts = body.split(f'\n{_BATCH_TOKEN}\n')
+        if len(parts) != len(inputs):
+            raise ValueError(f"Expected {len(inputs)} documents from pandoc, got {len(parts)}")
+        
+        with tempfile.TemporaryDirectory(prefix='pdfgen-') as tmp_dir:
+            def render(i: int) -> bool:
+                tex_file = Path(tmp_dir) / f'doc{i}.tex'
+                tex_file.write_text(
+                    f"{preamble}\\begin{{document}}\n{parts[i]}\n\\end{{document}}\n",
+                    encoding='utf-8'
+                )
+                try:
+                    # Rerun like `pandoc -o x.pdf` does, until the log stops asking.
+                    # Run from the source directory so relative image paths resolve
+                    for _ in range(_LATEX_MAX_RUNS):
+                        subprocess.run(
+                            ['pdflatex', '-interaction=nonstopmode', '-halt-on-error',
+                             f'-output-directory={tmp_dir}', str(tex_file)],
+                            cwd=str(Path(inputs[i]).parent), check=True, capture_output=True
+                        )
+                        if not _LATEX_RERUN_RE.search(tex_file.with_suffix('.log').read_bytes()):
+                            break
+                    shutil.move(str(tex_file.with_suffix('.pdf')), outputs[i])
+                except (subprocess.CalledProcessError, OSError) as e:
+                    logger.warning(f"pdflatex failed for {inputs[i]}: {e}")
+                    return False
+                logger.info(f"✓ Successfully created: {outputs[i]}")
+                return True
+            
+            with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as ex:
+                return list(ex.map(render, range(len(inputs))))
+    
+    def _can_batch_with_pandoc(self, inputs: List[str]) -> bool:
+        """Batching merges metadata, the TOC, link references, footnotes and
+        header IDs, so only plain Markdown qualifies"""
+        if self.cfg.processing.table_of_contents or not self.check_command('pdflatex'):
+            return False
+        for input_file in inputs:
+            if Path(input_file).suffix.lower() not in ['.md', '.markdown']:
+                return False
+            content = Path(input_file).read_text(encoding='utf-8')
+            # YAML front matter would set one title/author for every document
+            if content.partition('\n')[0].rstrip() == '---':
+                return False
+            # Reference definitions resolve across the joined source, so one
+            # file's [link][id] could pick up another file's [id]: URL
+            if _MD_LINK_DEF_RE.search(content):
+                return False
+            # Pandoc keeps one definition per footnote label and renames
+            # repeated header IDs (#intro -> #intro-1) across the joined source
+            if _MD_CROSS_REF_RE.search(content):
+                return False
+        return True
+    
+    def convert_with_wkhtmltopdf(self, input_file: str, output_file: str) -> Optional[bool]:
+        """Convert using wkhtmltopdf
+        
+        Inside a `with generator:` block the job is queued on the persistent
+        worker and None is returned: the outcome is known once it drains.
+        """
         try:
             # First convert markdown to HTML if needed
             input_path = Path(input_file)
+            html_input = None
+            source_args = []
             
             if input_path.suffix.lower() in ['.md', '.markdown']:
                 html_content = self.markdown_to_html(input_file)
-                temp_html = input_path.with_suffix('.html')
-                temp_html.write_text(html_content)
-                input_file = str(temp_html)
+                # The HTML no longer sits next to the source; keep relative links working
+                html_content = f'<base href="{input_path.resolve().parent.as_uri()}/">' + html_content
+                source_args = ['--enable-local-file-access']
+                if self._wk_worker is not None:
+                    # The worker reads arguments from stdin, so this needs a file;
+                    # it must outlive this call and is removed when the worker drains
+                    input_file = self._wk_worker.temp_html(html_content)
+                else:
+                    # Pipe through stdin: no temp file, no name clash between runs
+                    html_input = html_content.encode('utf-8')
+                    input_file = '-'
             
             cmd = [
                 'wkhtmltopdf',
-                '--page-size', self.config['output']['paper_size'].capitalize(),
-                '--margin-top', self.config['output']['margin'],
-                '--margin-bottom', self.config['output']['margin'],
-                '--margin-left', self.config['output']['margin'],
-                '--margin-right', self.config['output']['margin'],
+                '--page-size', self.cfg.output.paper_size.capitalize(),
+                '--margin-top', self.cfg.output.margin,
+                '--margin-bottom', self.cfg.output.margin,
+                '--margin-left', self.cfg.output.margin,
+                '--margin-right', self.cfg.output.margin,
                 '--encoding', 'utf-8',
+                *source_args,
                 input_file,
                 output_file
             ]
             
-            subprocess.run(cmd, check=True, capture_output=True)
+            if self._wk_worker is not None:
+                # A stale PDF would pass for this job's output after the drain
+                Path(output_file).unlink(missing_ok=True)
+                self._wk_worker.submit(cmd[1:])
+                logger.info(f"Queued for wkhtmltopdf: {output_file}")
+                return None
             
-            # Clean up temp file
-            if 'temp_html' in locals():
-                temp_html.unlink()
+            subprocess.run(cmd, input=html_input, check=True, capture_output=True)
             
             logger.info(f"✓ Successfully created: {output_file}")
             return True
@@ -243,7 +763,6 @@ class PDFGenerator:
         """Convert using Python pdfkit"""
         try:
             import pdfkit
-            import markdown2
             
             # Read input file
             with open(input_file, 'r', encoding='utf-8') as f:
@@ -251,71 +770,17 @@ class PDFGenerator:
             
             # Convert markdown to HTML if needed
             if Path(input_file).suffix.lower() in ['.md', '.markdown']:
-                html = markdown2.markdown(
+                html = self._render_markdown(
                     content,
-                    extras=['fenced-code-blocks', 'tables', 'code-friendly']
+                    ('fenced-code-blocks', 'tables', 'code-friendly')
                 )
             else:
                 html = content
             
-            # Add CSS styling
-            styled_html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <style>
-                    body {{
-                        font-family: {self.config['output']['font_family']};
-                        font-size: {self.config['output']['font_size']};
-                        line-height: 1.6;
-                        max-width: 900px;
-                        margin: 0 auto;
-                        padding: 20px;
-                    }}
-                    code {{
-                        background: #f4f4f4;
-                        padding: 2px 5px;
-                        border-radius: 3px;
-                    }}
-                    pre {{
-                        background: #f4f4f4;
-                        padding: 10px;
-                        border-radius: 5px;
-                        overflow-x: auto;
-                    }}
-                    table {{
-                        border-collapse: collapse;
-                        width: 100%;
-                    }}
-                    th, td {{
-                        border: 1px solid #ddd;
-                        padding: 8px;
-                        text-align: left;
-                    }}
-                    th {{
-                        background-color: #f2f2f2;
-                    }}
-                </style>
-            </head>
-            <body>
-                {html}
-            </body>
-            </html>
-            """
+            # Add CSS styling (template built once in _build_templates)
+            styled_html = self._pdfkit_head + html + self._pdfkit_tail
             
-            # Convert to PDF
-            options = {
-                'page-size': self.config['output']['paper_size'].capitalize(),
-                'margin-top': self.config['output']['margin'],
-                'margin-right': self.config['output']['margin'],
-                'margin-bottom': self.config['output']['margin'],
-                'margin-left': self.config['output']['margin'],
-                'encoding': 'UTF-8',
-                'no-outline': None
-            }
-            
-            pdfkit.from_string(styled_html, output_file, options=options)
+            pdfkit.from_string(styled_html, output_file, options=self._pdfkit_options)
             logger.info(f"✓ Successfully created: {output_file}")
             return True
             
@@ -331,7 +796,7 @@ class PDFGenerator:
             md2pdf(
                 output_file,
                 md_file_path=input_file,
-                css_file_path=self.config['paths'].get('custom_css'),
+                css_file_path=self.cfg.paths.custom_css,
                 base_url=os.path.dirname(os.path.abspath(input_file))
             )
             
@@ -345,14 +810,14 @@ class PDFGenerator:
     def convert_with_pypandoc(self, input_file: str, output_file: str) -> bool:
         """Convert using Python pypandoc"""
         try:
-            import pypandoc
+            pypandoc = _import_pypandoc()
             
             extra_args = [
-                f'--variable=geometry:{self.config["output"]["margin"]}',
-                f'--variable=fontsize:{self.config["output"]["font_size"]}',
+                f'--variable=geometry:{self.cfg.output.margin}',
+                f'--variable=fontsize:{self.cfg.output.font_size}',
             ]
             
-            if self.config['processing']['syntax_highlighting']:
+            if self.cfg.processing.syntax_highlighting:
                 extra_args.append('--highlight-style=tango')
             
             pypandoc.convert_file(
@@ -373,40 +838,21 @@ class PDFGenerator:
         """Convert using Python weasyprint"""
         try:
             from weasyprint import HTML, CSS
-            import markdown2
             
             # Read and convert markdown
             with open(input_file, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             if Path(input_file).suffix.lower() in ['.md', '.markdown']:
-                html_content = markdown2.markdown(
+                html_content = self._render_markdown(
                     content,
-                    extras=['fenced-code-blocks', 'tables']
+                    ('fenced-code-blocks', 'tables')
                 )
             else:
                 html_content = content
             
             # Create full HTML
-            html = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <style>
-                    @page {{
-                        size: {self.config['output']['paper_size']};
-                        margin: {self.config['output']['margin']};
-                    }}
-                    body {{
-                        font-family: {self.config['output']['font_family']};
-                        font-size: {self.config['output']['font_size']};
-                    }}
-                </style>
-            </head>
-            <body>{html_content}</body>
-            </html>
-            """
+            html = self._weasyprint_head + html_content + self._weasyprint_tail
             
             HTML(string=html).write_pdf(output_file)
             logger.info(f"✓ Successfully created: {output_file}")
@@ -416,15 +862,22 @@ class PDFGenerator:
             logger.error(f"weasyprint conversion failed: {e}")
             return False
     
+    def _render_markdown(self, content: str, extras: Tuple[str, ...]) -> str:
+        """Render Markdown through the content-hash cache"""
+        if len(content) > _MD_CHUNK_THRESHOLD:
+            # Bounds markdown2's peak memory, and an edit re-renders only its chunk
+            return ''.join(_md_cache_get(chunk.encode('utf-8'), extras)
+                           for chunk in _split_markdown(content))
+        return _md_cache_get(content.encode('utf-8'), extras)
+    
     def markdown_to_html(self, input_file: str) -> str:
         """Convert markdown to HTML"""
         try:
-            import markdown2
             with open(input_file, 'r', encoding='utf-8') as f:
                 content = f.read()
-            return markdown2.markdown(
+            return self._render_markdown(
                 content,
-                extras=['fenced-code-blocks', 'tables', 'code-friendly']
+                ('fenced-code-blocks', 'tables', 'code-friendly')
             )
         except ImportError:
             # Fallback to basic conversion
@@ -432,8 +885,14 @@ class PDFGenerator:
                 return f"<pre>{f.read()}</pre>"
     
     def batch_convert(self, input_dir: str, output_dir: str, 
-                     pattern: str = "*.md") -> Tuple[int, int]:
-        """Convert all matching files in a directory"""
+                     pattern: str = "*.md", method: Optional[str] = None,
+                     jobs: Optional[int] = None, force: bool = False) -> Tuple[int, int]:
+        """Convert all matching files in a directory, jobs at a time (default: all cores)
+        
+        Files whose PDF is newer than the source and was made with the same
+        config, or whose content was already converted with the same config,
+        are skipped unless force is set.
+        """
         input_path = Path(input_dir)
         output_path = Path(output_dir)
         
@@ -443,38 +902,160 @@ class PDFGenerator:
         
         output_path.mkdir(parents=True, exist_ok=True)
         
-        files = list(input_path.glob(pattern))
-        success_count = 0
+        jobs = jobs or os.cpu_count() or 1
+        started = time.time()
         
-        for file in files:
-            output_file = output_path / file.with_suffix('.pdf').name
-            logger.info(f"Converting: {file.name}")
-            
-            if self.convert(str(file), str(output_file)):
-                success_count += 1
+        # The mtime check only holds for PDFs that were made with this config
+        config_digest = self._config_digest(method)
+        stamp_file = output_path / CONFIG_STAMP_FILE
+        try:
+            stamps = json.loads(stamp_file.read_text())
+        except (OSError, ValueError):
+            stamps = {}
         
-        return success_count, len(files)
-    
-    def check_system(self) -> Dict:
-        """Check system capabilities and return status"""
-        status = {
-            'available_methods': self.available_methods,
-            'pandoc': self.check_command('pandoc'),
-            'wkhtmltopdf': self.check_command('wkhtmltopdf'),
-            'pdflatex': self.check_command('pdflatex'),
-            'python_modules': {}
-        }
+        # Discovered lazily so conversion starts before the listing finishes;
+        # unchanged files are skipped: cheap mtime check first, then the content-hash cache
+        total = 0
+        converted = 0
+        cache_keys = {}
+        outputs = []
+        
+        def discover() -> Iterator[Tuple[str, str, Optional[str]]]:
+            nonlocal total, converted
+            for file in _scan_files(input_path, pattern):
+                total += 1
+                input_file = str(file)
+                output_file = str(output_path / file.with_suffix('.pdf').name)
+                outputs.append(output_file)
+                if not force and stamps.get(Path(output_file).name) == config_digest and \
+                        Path(output_file).exists() and \
+                        Path(output_file).stat().st_mtime >= file.stat().st_mtime:
+                    logger.info(f"Up to date: {file.name}")
+                    converted += 1
+                    continue
+                cache_keys[output_file] = self._pdf_cache_key(input_file, method)
+                if not force and self._restore_cached_pdf(cache_keys[output_file], output_file):
+                    logger.info(f"Restored from cache: {file.name}")
+                    converted += 1
+                    continue
+                yield input_file, output_file, method
+        
+        tasks = discover()
+        first = method if method in self.available_methods else next(iter(self.available_methods), None)
         
-        # Check Python modules
-        modules = ['markdown2', 'pdfkit', 'md2pdf', 'pypandoc', 'weasyprint']
-        for module in modules:
+        # The batch backends need the whole list up front
+        if first in ('pandoc', 'wkhtmltopdf'):
+            tasks = list(tasks)
+        
+        # One pandoc process for the whole directory, per-file conversion for leftovers
+        if first == 'pandoc' and len(tasks) > 1 and self._can_batch_with_pandoc([t[0] for t in tasks]):
             try:
-                __import__(module)
-                status['python_modules'][module] = True
-            except ImportError:
-                status['python_modules'][module] = False
+                done = self.batch_convert_with_pandoc([t[0] for t in tasks], [t[1] for t in tasks], jobs)
+                tasks = [task for task, ok in zip(tasks, done) if not ok]
+            except (subprocess.CalledProcessError, ValueError, OSError) as e:
+                logger.warning(f"Batched pandoc run failed, converting files one by one: {e}")
+                done = []
+            converted += sum(done)
+        elif first == 'wkhtmltopdf' and len(tasks) > 1:
+            # One persistent wkhtmltopdf process; outputs appear once it drains
+            with self:
+                for input_file, output_file, _ in tasks:
+                    logger.info(f"Converting: {Path(input_file).name}")
+                    self.convert_with_wkhtmltopdf(input_file, output_file)
+            done = [_pdf_written(t[1]) for t in tasks]
+            tasks = [task for task, ok in zip(tasks, done) if not ok]
+            converted += sum(done)
+        
+        # Peek at two tasks: a pool is not worth starting for a single file
+        tasks = iter(tasks)
+        head = list(itertools.islice(tasks, 2))
+        if not head:
+            results = []
+        elif jobs == 1 or len(head) == 1:
+            _worker_init(self.config, self.available_methods)
+            results = [_convert_one(task) for task in itertools.chain(head, tasks)]
+        else:
+            # Some wkhtmltopdf builds serialize internally; threads are enough
+            # for what is then subprocess-bound work
+            if first == 'wkhtmltopdf':
+                _worker_init(self.config, self.available_methods)
+                executor = ThreadPoolExecutor(max_workers=jobs)
+            else:
+                executor = ProcessPoolExecutor(max_workers=jobs, initializer=_worker_init,
+                                               initargs=(self.config, self.available_methods))
+            with executor as ex:
+                # Submitted as discovered, so workers start while the scan goes on
+                futures = [ex.submit(_convert_one, task) for task in itertools.chain(head, tasks)]
+                results = []
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    logger.info(f"Progress: {len(results)}/{len(futures)}")
+        
+        # Remember what was just produced for the next run
+        for output_file, key in cache_keys.items():
+            output = Path(output_file)
+            if output.exists() and output.stat().st_mtime >= started:
+                self._store_cached_pdf(key, output)
+        
+        # Record the config behind each PDF written this run; a failed file may
+        # have left an older PDF in place, which must not pass the mtime check
+        for output_file in outputs:
+            output = Path(output_file)
+            if output.exists() and output.stat().st_mtime >= started:
+                stamps[output.name] = config_digest
+            elif output_file in cache_keys:
+                stamps.pop(output.name, None)
+        try:
+            tmp_file = stamp_file.with_name(f"{CONFIG_STAMP_FILE}.{os.getpid()}.tmp")
+            tmp_file.write_text(json.dumps(stamps))
+            os.replace(tmp_file, stamp_file)
+        except OSError as e:
+            logger.debug(f"Could not update {stamp_file}: {e}")
         
-        return status
+        return converted + sum(results), total
+    
+    def _config_digest(self, method: Optional[str]) -> str:
+        """Hash of everything besides the source that shapes the output"""
+        return hashlib.sha256(json.dumps([self.config, method], sort_keys=True).encode()).hexdigest()
+    
+    def _pdf_cache_key(self, input_file: str, method: Optional[str]) -> str:
+        """Content address for a conversion: source bytes, config and method"""
+        digest = hashlib.sha256(Path(input_file).read_bytes())
+        digest.update(json.dumps([self.config, method], sort_keys=True).encode())
+        return digest.hexdigest()
+    
+    def _restore_cached_pdf(self, key: str, output_file: str) -> bool:
+        """Copy a cached PDF into place; False if there is none"""
+        try:
+            shutil.copyfile(PDF_CACHE_DIR / f"{key}.pdf", output_file)
+            return True
+        except OSError:
+            return False
+    
+    def _store_cached_pdf(self, key: str, output: Path) -> None:
+        # Copy rather than hardlink: converters rewrite outputs in place
+        try:
+            PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_file = PDF_CACHE_DIR / f"{key}.{os.getpid()}.tmp"
+            shutil.copyfile(output, tmp_file)
+            os.replace(tmp_file, PDF_CACHE_DIR / f"{key}.pdf")
+        except OSError as e:
+            logger.debug(f"Could not cache {output}: {e}")
+    
+    def check_system(self) -> Dict:
+        """Check system capabilities and return status"""
+        if 'system' not in _DETECTION_CACHE:
+            _DETECTION_CACHE['system'] = {
+                'pandoc': self.check_command('pandoc'),
+                'wkhtmltopdf': self.check_command('wkhtmltopdf'),
+                'pdflatex': self.check_command('pdflatex'),
+                # Check Python modules
+                'python_modules': {
+                    module: _has_module(module)
+                    for module in ['markdown2', 'cmarkgfm', 'pdfkit', 'md2pdf', 'pypandoc', 'weasyprint']
+                }
+            }
+        return {'available_methods': self.available_methods, **_DETECTION_CACHE['system']}
 
 def main():
     """Command-line interface"""
@@ -512,6 +1093,16 @@ def main():
         default='*.md',
         help='File pattern for batch conversion (default: *.md)'
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='Parallel conversions for batch mode (default: CPU count)'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Batch mode: reconvert files even if they look up to date'
+    )
     parser.add_argument(
         '--check',
         action='store_true',
@@ -565,7 +1156,10 @@ def main():
         success, total = generator.batch_convert(
             args.input,
             args.output,
-            args.pattern
+            args.pattern,
+            method=args.method,
+            jobs=args.jobs,
+            force=args.force
         )
         print(f"\nBatch conversion complete: {success}/{total} files converted")
         return 0 if success == total else 1
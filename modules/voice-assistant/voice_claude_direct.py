@@ -9,13 +9,25 @@ import subprocess
 import sys
 import os
 import time
+import queue
 import signal
+import threading
+
+from voice_common import load_local_asr, load_vad, local_transcribe, open_microphone, vad_listen
+
 
 class VoiceToClaudeDirect:
     def __init__(self):
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.vad = load_vad()
+        self.microphone = open_microphone(self.vad)
         self.continuous_mode = True
+        self.asr = load_local_asr()
+        
+        if self.vad is not None:
+            # VAD gates speech per frame, so no ambient calibration is needed
+            print("✅ Ready!")
+            return
         
         # Calibrate for ambient noise
         with self.microphone as source:
@@ -28,24 +40,66 @@ class VoiceToClaudeDirect:
         """Listen for a single phrase"""
         with self.microphone as source:
             try:
-                if timeout:
+                if self.vad is not None:
+                    audio = vad_listen(self.vad, source, timeout=timeout, phrase_time_limit=15)
+                elif timeout:
                     audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=15)
                 else:
                     audio = self.recognizer.listen(source, phrase_time_limit=15)
                     
-                # Use Google's free speech recognition
-                text = self.recognizer.recognize_google(audio)
-                return text
-                
             except sr.WaitTimeoutError:
                 return None
-            except sr.UnknownValueError:
+        
+        return self.recognize(audio)
+    
+    def recognize(self, audio):
+        """Transcribe a captured phrase"""
+        if self.asr is not None:
+            # On-device recognition, no network round-trip
+            text = local_transcribe(self.asr, audio)
+            if not text:
                 print("❌ Couldn't understand. Please speak clearly.")
-                return None
-            except sr.RequestError as e:
-                print(f"❌ Speech service error: {e}")
-                return None
-                
+            return text or None
+        
+        try:
+            # Use Google's free speech recognition
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            print("❌ Couldn't understand. Please speak clearly.")
+            return None
+        except sr.RequestError as e:
+            print(f"❌ Speech service error: {e}")
+            return None
+    
+    def listen_in_background(self, callback):
+        """Capture phrases on a daemon thread; returns a function that stops it"""
+        if self.vad is None:
+            return self.recognizer.listen_in_background(
+                self.microphone, callback, phrase_time_limit=15
+            )
+        
+        running = threading.Event()
+        running.set()
+        
+        def capture():
+            with self.microphone as source:
+                while running.is_set():
+                    try:
+                        audio = vad_listen(self.vad, source, timeout=1, phrase_time_limit=15)
+                    except sr.WaitTimeoutError:
+                        continue
+                    if running.is_set():
+                        callback(self.recognizer, audio)
+        
+        thread = threading.Thread(target=capture, daemon=True)
+        thread.start()
+        
+        def stop(wait_for_stop=True):
+            running.clear()
+            if wait_for_stop:
+                thread.join()
+        return stop
+    
     def run_continuous(self):
         """Continuous listening mode"""
         print("\n🎙️  CONTINUOUS MODE - Listening...")
@@ -55,8 +109,24 @@ class VoiceToClaudeDirect:
         
         full_message = []
         
+        # Capture on a background thread so the mic keeps recording while the
+        # previous phrase is being recognized
+        phrases = queue.Queue(maxsize=8)
+        
+        def on_phrase(recognizer, audio):
+            try:
+                phrases.put_nowait(audio)
+            except queue.Full:
+                print("⚠️  Recognition is falling behind, dropped a phrase")
+        
+        stop_listening = self.listen_in_background(on_phrase)
+        
         while self.continuous_mode:
-            text = self.listen_once(timeout=2)
+            try:
+                audio = phrases.get(timeout=2)
+            except queue.Empty:
+                continue
+            text = self.recognize(audio)
             
             if text:
                 print(f"📝 Heard: {text}")
@@ -71,13 +141,14 @@ class VoiceToClaudeDirect:
                 elif "stop recording" in lower_text:
                     if full_message:
                         complete_text = " ".join(full_message)
-                        print(f"\n✅ Complete message: {complete_text}")
-                        print("-" * 40)
-                        # Output to stdout for piping
-                        print(complete_text, file=sys.stdout)
+                        # The whole block, including the piped message line, goes
+                        # out as one write: a single wake-up for the reader
+                        block = (f"\n✅ Complete message: {complete_text}\n" + "-" * 40 + "\n"
+                                 f"{complete_text}\n\n🎙️  Ready for next message...\n")
                         sys.stdout.flush()
+                        sys.stdout.buffer.write(block.encode())
+                        sys.stdout.buffer.flush()
                         full_message = []
-                        print("\n🎙️  Ready for next message...")
                     continue
                     
                 elif "clear message" in lower_text:
@@ -87,7 +158,8 @@ class VoiceToClaudeDirect:
                     
                 # Add to message
                 full_message.append(text)
-                
+        
+        stop_listening(wait_for_stop=False)
         return " ".join(full_message) if full_message else None
         
     def run_single(self):
@@ -0,0 +1,85 @@
+"""
+Shared microphone capture and recognition for the voice scripts
+WebRTC VAD gating, the 16 kHz microphone it needs, and offline Vosk ASR
+"""
+
+import json
+import os
+
+import speech_recognition as sr
+
+# Unpacked Vosk model; nothing is downloaded at runtime (see VOICE_README.md)
+VOSK_MODEL_PATH = os.path.expanduser(
+    os.environ.get('VOSK_MODEL', '~/.cache/vosk/vosk-model-small-en-us-0.15'))
+
+
+def load_local_asr():
+    """Offline Vosk recognizer (16 kHz) from VOSK_MODEL_PATH, or None to use Google's web API"""
+    try:
+        import vosk
+    except ImportError:
+        return None
+    if not os.path.isdir(VOSK_MODEL_PATH):
+        print(f"⚠️  No Vosk model at {VOSK_MODEL_PATH}, using Google speech recognition")
+        return None
+    try:
+        vosk.SetLogLevel(-1)
+        return vosk.KaldiRecognizer(vosk.Model(VOSK_MODEL_PATH), 16000)
+    except Exception as e:
+        print(f"⚠️  Vosk model unavailable ({e}), using Google speech recognition")
+        return None
+
+
+def local_transcribe(asr, audio):
+    """Text of a captured phrase via the Vosk recognizer, or '' if nothing was recognized"""
+    asr.AcceptWaveform(audio.get_raw_data(convert_rate=16000, convert_width=2))
+    return json.loads(asr.FinalResult()).get('text', '')
+
+
+def load_vad():
+    """WebRTC voice activity detector, or None to fall back to energy thresholds"""
+    try:
+        import webrtcvad
+    except ImportError:
+        return None
+    return webrtcvad.Vad(2)
+
+
+def open_microphone(vad):
+    """Microphone for the given VAD; WebRTC VAD needs 16-bit mono at a rate it supports"""
+    return sr.Microphone(sample_rate=16000) if vad is not None else sr.Microphone()
+
+
+def vad_listen(vad, source, timeout=None, phrase_time_limit=None, hangover_ms=300):
+    """Record one utterance from an open 16 kHz microphone, gated frame by frame by VAD"""
+    frame_ms = 30
+    frame_samples = source.SAMPLE_RATE * frame_ms // 1000
+    frame_bytes = frame_samples * source.SAMPLE_WIDTH
+    hangover = hangover_ms // frame_ms
+    max_frames = phrase_time_limit * 1000 // frame_ms if phrase_time_limit else None
+    
+    voiced = []
+    waited_ms = 0
+    silent = 0
+    while True:
+        frame = source.stream.read(frame_samples)
+        if len(frame) < frame_bytes:
+            break
+        speech = vad.is_speech(frame, source.SAMPLE_RATE)
+        
+        if not voiced:
+            # Still waiting for speech to start
+            if speech:
+                voiced.append(frame)
+                continue
+            waited_ms += frame_ms
+            if timeout and waited_ms >= timeout * 1000:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            continue
+        
+        voiced.append(frame)
+        silent = 0 if speech else silent + 1
+        if silent >= hangover or (max_frames and len(voiced) >= max_frames):
+            break
+    
+    return sr.AudioData(b''.join(voiced), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
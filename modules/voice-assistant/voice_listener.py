@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Voice Listener - Receiving end of voice_to_claude.py's socket
+Binds the voice socket and prints each transcription as one line on stdout
+"""
+
+import os
+import sys
+import signal
+import socket
+import threading
+import socketserver
+
+# Keep in sync with voice_to_claude.py
+VOICE_SOCKET = os.environ.get('CLAUDE_VOICE_SOCKET', '/tmp/claude_voice.sock')
+
+_output_lock = threading.Lock()
+
+
+class _UtteranceHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            # One writer at a time, so lines from two senders never interleave
+            with _output_lock:
+                sys.stdout.write(line.decode('utf-8', 'replace'))
+                sys.stdout.flush()
+
+
+def _listener_running():
+    """Whether another listener already accepts connections on VOICE_SOCKET"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(VOICE_SOCKET)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def main():
+    if _listener_running():
+        print(f"❌ A voice listener is already running on {VOICE_SOCKET}", file=sys.stderr)
+        sys.exit(1)
+    # A socket file left behind by a listener that died would block bind()
+    if os.path.exists(VOICE_SOCKET):
+        os.unlink(VOICE_SOCKET)
+    
+    server = socketserver.ThreadingUnixStreamServer(VOICE_SOCKET, _UtteranceHandler)
+    server.daemon_threads = True
+    # Stopped with SIGTERM too, the finally below still removes the socket
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"🎧 Listening for voice input on {VOICE_SOCKET}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Voice listener stopped", file=sys.stderr)
+    finally:
+        server.server_close()
+        os.unlink(VOICE_SOCKET)
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,140 @@
 #!/usr/bin/env python3
 import speech_recognition as sr
 import subprocess
+import socket
+import select
 import sys
 import time
 import threading
 import os
 
+from voice_common import load_local_asr, load_vad, local_transcribe, open_microphone, vad_listen
+
+# A listener on this socket (voice_listener.py) gets each utterance as one
+# newline-terminated line; without one, transcriptions are left in VOICE_FILE
+VOICE_SOCKET = os.environ.get('CLAUDE_VOICE_SOCKET', '/tmp/claude_voice.sock')
+VOICE_FILE = '/tmp/claude_voice_input.txt'
+
+
+def _peer_closed(sock):
+    """Whether the listener hung up; it never writes, so readable means EOF"""
+    readable, _, _ = select.select([sock], [], [], 0)
+    return bool(readable)
+
+
+def _connect_voice_socket():
+    """Connected AF_UNIX stream to the voice listener, or None if none is running"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(VOICE_SOCKET)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
 class VoiceToClaudeCode:
     def __init__(self):
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.vad = load_vad()
+        self.microphone = open_microphone(self.vad)
         self.listening = False
+        self.asr = load_local_asr()
+        self.sock = _connect_voice_socket()
+        self._source = None
+        # Open the input stream once; re-entering the Microphone per utterance
+        # re-opens the PortAudio device every time
+        try:
+            self._open_stream()
+        except BaseException:
+            self.close()
+            raise
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _open_stream(self):
+        """Open the microphone stream, calibrating it when there is no VAD"""
+        self._source = self.microphone.__enter__()
+        if self.vad is not None:
+            # VAD gates speech per frame, so the 2s calibration is skipped
+            return
         
         # Adjust for ambient noise
-        with self.microphone as source:
-            print("🎤 Calibrating for ambient noise... Please wait.")
-            self.recognizer.adjust_for_ambient_noise(source, duration=2)
-            print("✅ Calibration complete!")
+        print("🎤 Calibrating for ambient noise... Please wait.")
+        self.recognizer.adjust_for_ambient_noise(self._source, duration=2)
+        print("✅ Calibration complete!")
+    
+    def _close_stream(self):
+        """Release the microphone stream, e.g. while paused"""
+        if self._source is not None:
+            self.microphone.__exit__(None, None, None)
+            self._source = None
+    
+    def close(self):
+        """Release the microphone stream and the listener connection"""
+        self._close_stream()
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
             
     def listen_and_transcribe(self):
         """Listen to microphone input and convert to text"""
-        with self.microphone as source:
-            print("\n🎙️  Listening... (speak now)")
-            print("   Say 'stop listening' to pause or Ctrl+C to exit")
+        print("\n🎙️  Listening... (speak now)")
+        print("   Say 'stop listening' to pause or Ctrl+C to exit")
+        
+        try:
+            # Listen with timeout
+            if self.vad is not None:
+                audio = vad_listen(self.vad, self._source, timeout=1, phrase_time_limit=10)
+            else:
+                audio = self.recognizer.listen(self._source, timeout=1, phrase_time_limit=10)
+            print("🔄 Processing speech...")
             
-            try:
-                # Listen with timeout
-                audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=10)
-                print("🔄 Processing speech...")
-                
-                # Try Google's free speech recognition first
-                try:
-                    text = self.recognizer.recognize_google(audio)
-                    return text
-                except sr.UnknownValueError:
+            # Prefer on-device recognition when Vosk is installed
+            if self.asr is not None:
+                text = local_transcribe(self.asr, audio)
+                if not text:
                     print("❌ Could not understand audio. Please speak clearly.")
-                    return None
-                except sr.RequestError as e:
-                    print(f"❌ Error with speech recognition service: {e}")
-                    return None
-                    
-            except sr.WaitTimeoutError:
+                return text or None
+            
+            # Otherwise Google's free speech recognition
+            try:
+                text = self.recognizer.recognize_google(audio)
+                return text
+            except sr.UnknownValueError:
+                print("❌ Could not understand audio. Please speak clearly.")
+                return None
+            except sr.RequestError as e:
+                print(f"❌ Error with speech recognition service: {e}")
                 return None
                 
+        except sr.WaitTimeoutError:
+            return None
+            
+    def send_to_listener(self, text):
+        """Send one line to the voice listener, reconnecting if it restarted"""
+        for _ in range(2):
+            if self.sock is not None and _peer_closed(self.sock):
+                # After a hang-up sendall could still "succeed" into the buffer
+                self.sock.close()
+                self.sock = None
+            if self.sock is None:
+                # The listener may have started or restarted since the last try
+                self.sock = _connect_voice_socket()
+                if self.sock is None:
+                    return False
+            try:
+                self.sock.sendall(text.encode('utf-8') + b'\n')
+                return True
+            except OSError:
+                self.sock.close()
+                self.sock = None
+        return False
+    
     def send_to_claude(self, text):
         """Send the transcribed text to Claude Code"""
         if not text:
@@ -53,17 +145,25 @@ class VoiceToClaudeCode:
         # Check for stop command
         if "stop listening" in text.lower():
             print("⏸️  Paused. Press Enter to resume or Ctrl+C to exit.")
+            # Don't hold the device while nobody is listening
+            self._close_stream()
             input()
+            self._open_stream()
+            return
+        
+        # Push straight to a listening consumer when there is one
+        if self.send_to_listener(text):
+            print(f"✅ Sent to Claude: {text}")
             return
         
-        # Send to Claude Code (assuming it's running in interactive mode)
         try:
-            # Write to a temporary file that Claude Code can read
-            with open('/tmp/claude_voice_input.txt', 'w') as f:
+            # Write to a temporary file that Claude Code can read; the rename
+            # means a reader never sees a half-written transcription
+            temp_file = f"{VOICE_FILE}.{os.getpid()}"
+            with open(temp_file, 'w') as f:
                 f.write(text)
+            os.replace(temp_file, VOICE_FILE)
             
-            # You can also try to send directly to Claude Code if it's running
-            # This assumes Claude Code is running in interactive mode
             print(f"✅ Ready to send to Claude: {text}")
             print("   Copy the text above and paste it into Claude Code")
             print("   OR press Enter to continue listening...")
@@ -97,8 +197,8 @@ class VoiceToClaudeCode:
 
 def main():
     try:
-        voice_assistant = VoiceToClaudeCode()
-        voice_assistant.run()
+        with VoiceToClaudeCode() as voice_assistant:
+            voice_assistant.run()
     except Exception as e:
         print(f"❌ Error: {e}")
         print("\nTroubleshooting:")
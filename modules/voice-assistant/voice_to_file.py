@@ -9,11 +9,32 @@ import os
 import time
 from datetime import datetime
 
+
+# Model name in the local Hugging Face cache, or an unpacked model directory;
+# nothing is downloaded at runtime (see VOICE_README.md)
+WHISPER_MODEL = os.environ.get('VOICE_WHISPER_MODEL', 'tiny.en')
+
+
+def _load_local_whisper():
+    """Locally cached faster-whisper model with int8 weights, or None to use Google's web API"""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        return None
+    try:
+        return WhisperModel(WHISPER_MODEL, device='cpu', compute_type='int8', cpu_threads=4,
+                            local_files_only=True)
+    except Exception as e:
+        print(f"⚠️  Whisper model unavailable ({e}), using Google speech recognition")
+        return None
+
+
 class VoiceToFile:
     def __init__(self):
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
         self.output_file = "/tmp/claude_voice_input.txt"
+        self.model = _load_local_whisper()
         
         # Calibrate for ambient noise
         with self.microphone as source:
@@ -32,7 +53,7 @@ class VoiceToFile:
                 audio = self.recognizer.listen(source, timeout=2, phrase_time_limit=30)
                 print("🔄 Processing...")
                 
-                text = self.recognizer.recognize_google(audio)
+                text = self.recognize(audio)
                 print(f"✅ Transcribed: {text}")
                 
                 # Write to file
@@ -55,6 +76,20 @@ class VoiceToFile:
             except sr.RequestError as e:
                 print(f"❌ Speech service error: {e}")
                 return None
+    
+    def recognize(self, audio):
+        """Transcribe on-device with Whisper when available, else with Google"""
+        if self.model is None:
+            return self.recognizer.recognize_google(audio)
+        
+        import numpy as np
+        pcm = np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), np.int16)
+        segments, _ = self.model.transcribe(pcm.astype(np.float32) / 32768.0,
+                                            beam_size=1, vad_filter=True)
+        text = "".join(segment.text for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
 
 def main():
     try:
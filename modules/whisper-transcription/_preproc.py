@@ -0,0 +1,31 @@
+"""
+Audio preprocessing kernels for the Whisper module
+JIT-compiled with Numba when it is installed, plain NumPy otherwise
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+if NUMBA_AVAILABLE:
+    # cache=True keeps the compiled kernel on disk between runs
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _int16_to_float32(pcm, out):
+        for i in prange(pcm.shape[0]):
+            out[i] = pcm[i] * _INT16_SCALE
+else:
+    def _int16_to_float32(pcm, out):
+        np.multiply(pcm, _INT16_SCALE, out=out)
+
+
+def int16_to_float32(pcm: np.ndarray) -> np.ndarray:
+    """Scale int16 PCM to float32 in [-1, 1) in a single pass, as whisper.load_audio does"""
+    out = np.empty(pcm.shape[0], dtype=np.float32)
+    _int16_to_float32(pcm, out)
+    return out
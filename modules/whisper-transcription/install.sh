@@ -193,6 +193,8 @@ install_module_files() {
     
     # Copy module files
     cp "$MODULE_DIR/whisper_transcribe.py" "$INSTALL_DIR/"
+    cp "$MODULE_DIR/server.py" "$INSTALL_DIR/"
+    cp "$MODULE_DIR/_preproc.py" "$INSTALL_DIR/"
     cp "$MODULE_DIR/config.json" "$INSTALL_DIR/"
     cp "$MODULE_DIR/README.md" "$INSTALL_DIR/" 2>/dev/null || true
     
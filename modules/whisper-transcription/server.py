@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+HTTP transcription server for the Whisper module
+Keeps one transcriber (and its loaded model) per worker process and decodes
+a bounded number of requests at a time
+
+Run with: uvicorn server:app --workers $WEB_CONCURRENCY
+"""
+
+import os
+import asyncio
+import logging
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+
+from whisper_transcribe import WhisperTranscriber
+
+logger = logging.getLogger(__name__)
+
+transcriber = WhisperTranscriber(os.environ.get('WHISPER_CONFIG'))
+
+# Requests decoded at once; faster-whisper runs that many in parallel on one
+# model (options.workers), the rest wait here instead of inside the model
+MAX_CONCURRENT = int(os.environ.get('WHISPER_MAX_CONCURRENT', transcriber.config['options']['workers']))
+_slots: asyncio.Semaphore
+
+
+def _transcribe_one(path: str) -> Dict:
+    """Transcribe one file on the shared model, falling back to the other backends"""
+    if transcriber.available_backends[:1] == ['faster-whisper']:
+        try:
+            # Batched decoding of the file's own VAD segments
+            result = next(transcriber.transcribe_batch([path], transcriber.batch_size))
+            if "error" not in result:
+                return result
+        except Exception as e:
+            logger.warning(f"Batched faster-whisper failed: {e}")
+    return transcriber.transcribe(path)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _slots
+    # Created on the server's event loop (Python < 3.10 binds it at creation)
+    _slots = asyncio.Semaphore(MAX_CONCURRENT)
+    yield
+
+
+app = FastAPI(title='Whisper Transcription', lifespan=lifespan)
+
+
+@app.post('/transcribe')
+async def transcribe(file: UploadFile = File(...)) -> Dict:
+    """Transcribe one uploaded audio file"""
+    # Keep the extension so the decoder can tell the container format
+    suffix = Path(file.filename or '').suffix or '.wav'
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
+        tmp_file.write(await file.read())
+    
+    try:
+        async with _slots:
+            # Decoding blocks; keep the event loop free for other requests
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, _transcribe_one, tmp_file.name)
+    finally:
+        os.remove(tmp_file.name)
+    
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
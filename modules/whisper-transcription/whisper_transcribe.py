@@ -5,14 +5,21 @@ High-quality speech-to-text using OpenAI's Whisper model
 """
 
 import os
+import gc
 import sys
 import json
+import mmap
+import queue
+import shutil
 import argparse
 import logging
 import tempfile
+import functools
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple
+from typing import Iterator, Optional, Dict, List, TextIO, Tuple
 import warnings
 
 # Suppress warnings
@@ -25,13 +32,231 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Backends in the order transcribe() tries them: CTranslate2 first, API last
+BACKEND_PREFERENCE = ('faster-whisper', 'openvino', 'whisperx', 'whisper-cpp', 'whisper-python', 'openai-api')
+
+WHISPER_MODELS = ('tiny', 'base', 'small', 'medium', 'large')
+
+
+@functools.lru_cache(maxsize=None)
+def _which(command: str) -> Optional[str]:
+    """PATH lookup, done once per command per process"""
+    return shutil.which(command)
+
+
+def dumps_json(obj, pretty: bool = False) -> str:
+    """Serialize a result, compact unless pretty; orjson when it is installed
+    
+    Segment lists of long recordings run to thousands of entries, where
+    indentation roughly triples the size and the stdlib encoder is slow.
+    """
+    try:
+        import orjson
+        options = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=options).decode('utf-8')
+    except ImportError:
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False)
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+# Loaded models, kept for the life of the process: loading re-reads the weights
+# and sets up the device, which dominates the cost of short files
+@functools.lru_cache(maxsize=4)
+def _get_whisper(model_name: str, device: Optional[str]):
+    import whisper
+    return whisper.load_model(model_name, device=device)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_faster(model_name: str, device: str, compute_type: str, cpu_threads: int, num_workers: int):
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_name, device=device, compute_type=compute_type,
+                        cpu_threads=cpu_threads, num_workers=num_workers)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_whisperx(model_name: str, device: str):
+    import whisperx
+    return whisperx.load_model(model_name, device=device)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_whisperx_align(language: str, device: str):
+    import whisperx
+    return whisperx.load_align_model(language_code=language, device=device)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_openvino(model_dir: str, device: str, cache_dir: str):
+    import openvino_genai
+    # CACHE_DIR keeps the blob compiled for the device, so later processes skip compilation
+    return openvino_genai.WhisperPipeline(model_dir, device, CACHE_DIR=cache_dir)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_silero_vad():
+    from silero_vad import load_silero_vad
+    return load_silero_vad()
+
+
+_BACKEND_MODELS = {
+    'whisper-python': (_get_whisper,),
+    'faster-whisper': (_get_faster,),
+    'whisperx': (_get_whisperx, _get_whisperx_align),
+    'openvino': (_get_openvino,),
+}
+
+
+def release_models(backend: str) -> None:
+    """Drop a backend's cached models and hand their GPU memory back to the driver"""
+    for factory in _BACKEND_MODELS.get(backend, ()):
+        factory.cache_clear()
+    gc.collect()
+    # Only if a backend already brought torch in; not worth importing it here
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class _TrackedWriter:
+    """Passes writes through to a stream and remembers whether any happened"""
+    
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+        self.written = False
+    
+    def write(self, text: str) -> int:
+        self.written = True
+        return self.fp.write(text)
+    
+    def flush(self) -> None:
+        self.fp.flush()
+
+
+# Serializes decoding on a shared whisper-python model
+_WHISPER_LOCK = threading.Lock()
+
+
+def load_audio_array(path: str, sample_rate: int = 16000):
+    """Decode any audio file to mono float32 samples in-process with PyAV
+    
+    Same output as whisper.load_audio, without an ffmpeg subprocess or a
+    temporary file. Raises ImportError if PyAV is not installed.
+    """
+    import av
+    import numpy as np
+    from _preproc import int16_to_float32
+    
+    # Collect int16 like whisper.load_audio and scale once at the end
+    resampler = av.AudioResampler(format='s16', layout='mono', rate=sample_rate)
+    chunks = []
+    with av.open(path) as container:
+        for frame in container.decode(audio=0):
+            chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(frame))
+    # Flush what the resampler still holds
+    chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(None))
+    return int16_to_float32(np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16))
+
+
+# Microphone capture is cut for decoding at the first quiet block after this many
+# seconds, so earlier speech is transcribed while recording continues
+_MIC_MIN_CHUNK_SECONDS = 3
+_MIC_SILENCE_RMS = 0.01
+
+
+# Weight files are faulted into the page cache in slices this size, several at a time
+_PREFETCH_CHUNK = 64 * 1024 * 1024
+
+
+def _prefetch_chunk(path: Path, offset: int, length: int) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if hasattr(mmap, 'MAP_POPULATE'):
+            # Mapping with MAP_POPULATE reads the whole slice in before returning
+            mmap.mmap(fd, length, flags=mmap.MAP_SHARED | mmap.MAP_POPULATE,
+                      prot=mmap.PROT_READ, offset=offset).close()
+        elif hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def prefetch_files(paths: List[Path], workers: int = 8) -> None:
+    """Read files into the page cache with parallel requests, so the loader's
+    sequential read is served from memory instead of the disk"""
+    jobs = []
+    for path in paths:
+        try:
+            size = path.stat().st_size
+        except OSError:
+            continue
+        for offset in range(0, size, _PREFETCH_CHUNK):
+            jobs.append((path, offset, min(_PREFETCH_CHUNK, size - offset)))
+    
+    pending = queue.SimpleQueue()
+    for job in jobs:
+        pending.put(job)
+    
+    def run():
+        while True:
+            try:
+                job = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                _prefetch_chunk(*job)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Prefetch of {job[0]} failed: {e}")
+    
+    # Plain daemon threads: ThreadPoolExecutor workers are joined at interpreter
+    # exit, which would hold a quick exit until the whole file had been read
+    threads = [threading.Thread(target=run, daemon=True) for _ in range(min(workers, len(jobs)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
 class WhisperTranscriber:
     """OpenAI Whisper transcription with multiple backend support"""
     
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self, config_file: Optional[str] = None, preload: bool = True,
+                 backend: Optional[str] = None):
         self.config = self.load_config(config_file)
         self.available_backends = self.detect_backends()
         self.model_name = self.config.get('model', 'base')
+        self.device = self.resolve_device()
+        
+        # Settings read on every transcription, resolved once
+        options = self.config['options']
+        self.language = None if self.config['language'] == 'auto' else self.config['language']
+        self.temperature = self.config['temperature']
+        self.fp16 = options['fp16']
+        self.threads = options['threads']
+        self.batch_size = options['batch_size']
+        self.compression_ratio_threshold = options['compression_ratio_threshold']
+        self.logprob_threshold = options['logprob_threshold']
+        self.no_speech_threshold = options['no_speech_threshold']
+        self.condition_on_previous_text = options['condition_on_previous_text']
+        self.pretty_json = options['pretty_json']
+        
+        # Only warm up the backend that transcribe(..., backend) will try first
+        self._warmup = None
+        if backend not in self.available_backends:
+            backend = self.available_backends[0] if self.available_backends else None
+        
+        # Warm the page cache with that backend's weights while the caller
+        # gets on with argument handling, recording, etc.
+        if preload and self.config['backends']['cache_models']:
+            weights = self.model_weight_files(backend)
+            if weights:
+                threading.Thread(target=prefetch_files, args=(weights,), daemon=True).start()
+        
+        # Load the faster-whisper model in the background as well, so the first
+        # transcription doesn't wait for it
+        if preload and self.config['backends']['prefer_local'] and backend == 'faster-whisper':
+            self._warmup = threading.Thread(target=self._preload_faster_whisper, daemon=True)
+            self._warmup.start()
         
     def load_config(self, config_file: Optional[str]) -> Dict:
         """Load configuration from JSON file or use defaults"""
@@ -43,8 +268,15 @@ class WhisperTranscriber:
             "temperature": 0,  # 0 for deterministic, higher for variation
             "options": {
                 "fp16": True,  # Use FP16 (faster on GPU)
+                "compute_type": "auto",  # faster-whisper: auto, int8, int8_float16, int8_float32, float16, float32
                 "threads": 4,  # CPU threads
+                "workers": 1,  # faster-whisper: concurrent transcriptions per model
+                "batch_size": 16,  # faster-whisper: segments decoded together in batch mode
+                "parallel_vad_batching": False,  # whisper-python: decode Silero VAD segments as one batch
+                "openvino_device": "NPU",  # openvino: NPU, GPU (integrated) or CPU
+                "openvino_model_dir": None,  # openvino: exported model, default ~/.cache/openvino_whisper/whisper-<model>
                 "verbose": False,
+                "pretty_json": False,  # indent JSON output and _meta.json files
                 "condition_on_previous_text": True,
                 "compression_ratio_threshold": 2.4,
                 "logprob_threshold": -1.0,
@@ -110,22 +342,63 @@ class WhisperTranscriber:
         except ImportError:
             pass
         
+        # Check for OpenVINO GenAI (NPU / integrated GPU)
+        try:
+            import openvino_genai
+            backends.append('openvino')
+            logger.info("✓ OpenVINO GenAI detected")
+        except ImportError:
+            pass
+        
         if not backends:
             logger.warning("⚠ No Whisper backends available!")
             logger.info("Install with: pip install openai-whisper")
         
+        backends.sort(key=BACKEND_PREFERENCE.index)
         return backends
     
+    def model_weight_files(self, backend: Optional[str]) -> List[Path]:
+        """Already-downloaded weight files for a local backend"""
+        home_cache = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache'))
+        if backend == 'faster-whisper':
+            # CTranslate2 conversions live in the Hugging Face hub cache
+            hub = Path(os.environ.get('HF_HUB_CACHE', home_cache / 'huggingface' / 'hub'))
+            repo = hub / f'models--Systran--faster-whisper-{self.model_name}'
+            return sorted(repo.glob('snapshots/*/model.bin'))
+        if backend == 'whisper-python':
+            weights = home_cache / 'whisper' / f'{self.model_name}.pt'
+            return [weights] if weights.exists() else []
+        return []
+    
+    def resolve_device(self) -> str:
+        """The configured device, with "auto" resolved to 'cuda' or 'cpu'"""
+        device = self.config['device']
+        if device != 'auto':
+            return device
+        
+        try:
+            import torch
+            return 'cuda' if torch.cuda.is_available() else 'cpu'
+        except ImportError:
+            pass
+        try:
+            # faster-whisper installs have CTranslate2 but not necessarily torch
+            import ctranslate2
+            return 'cuda' if ctranslate2.get_cuda_device_count() > 0 else 'cpu'
+        except ImportError:
+            return 'cpu'
+    
     def check_command(self, command: str) -> bool:
         """Check if a command is available"""
-        try:
-            subprocess.run(['which', command], capture_output=True, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return _which(command) is not None
     
-    def transcribe(self, audio_file: str, backend: Optional[str] = None) -> Dict:
-        """Transcribe audio file using specified or best available backend"""
+    def transcribe(self, audio_file: str, backend: Optional[str] = None,
+                   output_fp: Optional[TextIO] = None) -> Dict:
+        """Transcribe audio file using specified or best available backend
+        
+        If output_fp is given the text is also written to it: segment by
+        segment as it is decoded for faster-whisper, in one piece otherwise.
+        """
         
         audio_path = Path(audio_file)
         if not audio_path.exists():
@@ -141,24 +414,48 @@ class WhisperTranscriber:
         if not backends_to_try:
             return {"error": "No transcription backends available"}
         
+        # Where a failed backend's partial streamed text starts, to drop it again.
+        # A pipe or terminal can't be rewound, so there only note that text went out
+        start = output_fp.tell() if output_fp is not None and output_fp.seekable() else None
+        if output_fp is not None and start is None:
+            output_fp = _TrackedWriter(output_fp)
+        
         # Try each backend
-        for current_backend in backends_to_try:
+        for i, current_backend in enumerate(backends_to_try):
             logger.info(f"Attempting transcription with: {current_backend}")
             
             try:
-                if current_backend == 'whisper-python':
-                    return self.transcribe_with_whisper_python(audio_file)
+                if current_backend == 'faster-whisper':
+                    # Streams into output_fp itself
+                    return self.transcribe_with_faster_whisper(audio_file, output_fp)
+                elif current_backend == 'whisper-python':
+                    result = self.transcribe_with_whisper_python(audio_file)
                 elif current_backend == 'whisper-cpp':
-                    return self.transcribe_with_whisper_cpp(audio_file)
-                elif current_backend == 'faster-whisper':
-                    return self.transcribe_with_faster_whisper(audio_file)
+                    result = self.transcribe_with_whisper_cpp(audio_file)
                 elif current_backend == 'openai-api':
-                    return self.transcribe_with_openai_api(audio_file)
+                    result = self.transcribe_with_openai_api(audio_file)
                 elif current_backend == 'whisperx':
-                    return self.transcribe_with_whisperx(audio_file)
+                    result = self.transcribe_with_whisperx(audio_file)
+                elif current_backend == 'openvino':
+                    result = self.transcribe_with_openvino(audio_file)
+                else:
+                    continue
             except Exception as e:
                 logger.warning(f"Backend {current_backend} failed: {e}")
+                if start is not None:
+                    output_fp.seek(start)
+                    output_fp.truncate()
+                elif output_fp is not None and output_fp.written:
+                    # Another backend would repeat the text already written
+                    return {"error": f"{current_backend} failed after partial output: {e}"}
+                # Make room on the GPU for the next backend's model
+                if self.device == 'cuda' and i + 1 < len(backends_to_try):
+                    release_models(current_backend)
                 continue
+            
+            if output_fp is not None:
+                output_fp.write(result["text"])
+            return result
         
         return {"error": "All transcription backends failed"}
     
@@ -166,20 +463,32 @@ class WhisperTranscriber:
         """Transcribe using OpenAI Whisper Python package"""
         import whisper
         
-        # Load model
-        model = whisper.load_model(self.model_name)
+        # Load model (cached across calls)
+        model = _get_whisper(self.model_name, self.device)
+        audio = self.load_audio(audio_file, whisper.load_audio)
         
-        # Transcribe
-        result = model.transcribe(
-            audio_file,
-            language=None if self.config['language'] == 'auto' else self.config['language'],
-            temperature=self.config['temperature'],
-            compression_ratio_threshold=self.config['options']['compression_ratio_threshold'],
-            logprob_threshold=self.config['options']['logprob_threshold'],
-            no_speech_threshold=self.config['options']['no_speech_threshold'],
-            condition_on_previous_text=self.config['options']['condition_on_previous_text'],
-            fp16=self.config['options']['fp16']
-        )
+        # The cached model is shared and whisper installs per-decode hooks on
+        # it, so concurrent batch jobs take turns
+        with _WHISPER_LOCK:
+            if self.config['options']['parallel_vad_batching']:
+                try:
+                    return self.transcribe_vad_batched(model, audio)
+                except ImportError as e:
+                    logger.warning(f"Parallel VAD batching unavailable ({e}), decoding sequentially")
+            
+            # Transcribe. whisper already keeps a kv-cache across decode steps, so
+            # each step embeds only the newest token; the output projection
+            # depends on the step's hidden state and has nothing to reuse
+            result = model.transcribe(
+                audio,
+                language=self.language,
+                temperature=self.temperature,
+                compression_ratio_threshold=self.compression_ratio_threshold,
+                logprob_threshold=self.logprob_threshold,
+                no_speech_threshold=self.no_speech_threshold,
+                condition_on_previous_text=self.condition_on_previous_text,
+                fp16=self.fp16
+            )
         
         return {
             "text": result["text"],
@@ -188,38 +497,157 @@ class WhisperTranscriber:
             "backend": "whisper-python"
         }
     
-    def transcribe_with_faster_whisper(self, audio_file: str) -> Dict:
-        """Transcribe using Faster-whisper (optimized version)"""
-        from faster_whisper import WhisperModel
+    def transcribe_vad_batched(self, model, audio) -> Dict:
+        """Decode a file's speech segments in parallel with a whisper-python model
         
-        # Load model
-        model = WhisperModel(
-            self.model_name,
-            device="auto" if self.config['device'] == 'auto' else self.config['device'],
-            compute_type="float16" if self.config['options']['fp16'] else "float32"
+        Silero VAD splits the audio into utterances, which are independent of
+        each other, so instead of one long autoregressive pass each utterance
+        is padded to 30s and decoded as part of a batch. There is no
+        conditioning on previous text, which suits command-style audio.
+        """
+        import torch
+        import whisper
+        from silero_vad import get_speech_timestamps
+        
+        speech = get_speech_timestamps(torch.from_numpy(audio), _get_silero_vad(),
+                                       sampling_rate=whisper.audio.SAMPLE_RATE)
+        
+        # Whisper's window is 30s; longer utterances are decoded as several pieces
+        spans = []
+        for ts in speech:
+            for start in range(ts['start'], ts['end'], whisper.audio.N_SAMPLES):
+                spans.append((start, min(start + whisper.audio.N_SAMPLES, ts['end'])))
+        
+        options = whisper.DecodingOptions(
+            language=self.language,
+            temperature=self.temperature,
+            without_timestamps=True,
+            fp16=self.fp16 and model.device.type != 'cpu'
         )
+        batch_size = self.batch_size
+        
+        segments = []
+        language = None
+        for i in range(0, len(spans), batch_size):
+            batch = spans[i:i + batch_size]
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audio[start:end]), model.dims.n_mels)
+                for start, end in batch
+            ]).to(model.device)
+            for (start, end), decoded in zip(batch, model.decode(mel, options)):
+                language = language or decoded.language
+                segments.append({
+                    "id": len(segments),
+                    "start": start / whisper.audio.SAMPLE_RATE,
+                    "end": end / whisper.audio.SAMPLE_RATE,
+                    "text": decoded.text
+                })
+        
+        return {
+            "text": " ".join(seg["text"].strip() for seg in segments),
+            "language": language or "unknown",
+            "segments": segments,
+            "backend": "whisper-python"
+        }
+    
+    def transcribe_with_faster_whisper(self, audio_file: str,
+                                       output_fp: Optional[TextIO] = None) -> Dict:
+        """Transcribe using Faster-whisper (optimized version)
+        
+        Segments are decoded lazily; with output_fp each one is written as soon
+        as it is ready rather than after the whole file.
+        """
+        model = self.load_faster_whisper_model()
         
         # Transcribe
         segments, info = model.transcribe(
             audio_file,
-            language=None if self.config['language'] == 'auto' else self.config['language'],
-            temperature=self.config['temperature'],
-            compression_ratio_threshold=self.config['options']['compression_ratio_threshold'],
-            log_prob_threshold=self.config['options']['logprob_threshold'],
-            no_speech_threshold=self.config['options']['no_speech_threshold'],
-            condition_on_previous_text=self.config['options']['condition_on_previous_text']
+            language=self.language,
+            temperature=self.temperature,
+            compression_ratio_threshold=self.compression_ratio_threshold,
+            log_prob_threshold=self.logprob_threshold,
+            no_speech_threshold=self.no_speech_threshold,
+            condition_on_previous_text=self.condition_on_previous_text
         )
         
-        # Collect text
-        full_text = " ".join([segment.text for segment in segments])
+        # Collect text, streaming it out as it arrives
+        texts = []
+        for segment in segments:
+            if output_fp is not None:
+                if texts:
+                    output_fp.write(" ")
+                output_fp.write(segment.text)
+                output_fp.flush()
+            texts.append(segment.text)
         
         return {
-            "text": full_text,
+            "text": " ".join(texts),
             "language": info.language,
             "duration": info.duration,
             "backend": "faster-whisper"
         }
     
+    def transcribe_batch(self, files: List[str], batch_size: int = 16) -> Iterator[Dict]:
+        """Transcribe files with one faster-whisper model and batched decoding
+        
+        Each file's VAD segments are decoded batch_size at a time by a
+        BatchedInferencePipeline; results are yielded in input order, with an
+        "error" key for files that failed. Raises ImportError before the first
+        result if faster-whisper has no batched pipeline.
+        """
+        from faster_whisper import BatchedInferencePipeline
+        
+        pipeline = BatchedInferencePipeline(model=self.load_faster_whisper_model())
+        
+        for audio_file in files:
+            logger.info(f"Transcribing: {Path(audio_file).name}")
+            try:
+                segments, info = pipeline.transcribe(
+                    audio_file,
+                    language=self.language,
+                    temperature=self.temperature,
+                    compression_ratio_threshold=self.compression_ratio_threshold,
+                    log_prob_threshold=self.logprob_threshold,
+                    no_speech_threshold=self.no_speech_threshold,
+                    batch_size=batch_size
+                )
+                yield {
+                    "text": " ".join([segment.text for segment in segments]),
+                    "language": info.language,
+                    "duration": info.duration,
+                    "backend": "faster-whisper"
+                }
+            except Exception as e:
+                logger.warning(f"Batched faster-whisper failed for {audio_file}: {e}")
+                yield {"error": str(e)}
+    
+    def _preload_faster_whisper(self) -> None:
+        try:
+            self.load_faster_whisper_model()
+        except Exception as e:
+            # transcribe() loads it again and reports the error there
+            logger.debug(f"faster-whisper preload failed: {e}")
+    
+    def load_faster_whisper_model(self):
+        """The faster-whisper model for the configured size, device and compute type (cached)"""
+        # Wait for a preload in flight rather than loading a second copy
+        if self._warmup is not None and self._warmup is not threading.current_thread():
+            self._warmup.join()
+        return _get_faster(
+            self.model_name,
+            device=self.device,
+            compute_type=self.faster_whisper_compute_type(),
+            cpu_threads=self.threads,
+            num_workers=self.config['options']['workers']
+        )
+    
+    def faster_whisper_compute_type(self) -> str:
+        """CTranslate2 compute type; "auto" means int8 weights (int8_float16 on CUDA)"""
+        compute_type = self.config['options']['compute_type']
+        if compute_type != 'auto':
+            return compute_type
+        return 'int8_float16' if self.device == 'cuda' else 'int8'
+    
     def transcribe_with_whisper_cpp(self, audio_file: str) -> Dict:
         """Transcribe using whisper.cpp (C++ implementation)"""
         
@@ -231,24 +659,23 @@ class WhisperTranscriber:
             '--model', self.model_name,
             '--file', wav_file,
             '--output-txt',
-            '--threads', str(self.config['options']['threads'])
+            '--threads', str(self.threads)
         ]
         
-        if self.config['language'] != 'auto':
-            cmd.extend(['--language', self.config['language']])
+        if self.language is not None:
+            cmd.extend(['--language', self.language])
         
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, check=True)
             
             # Read output file
-            output_file = wav_file.replace('.wav', '.txt')
-            with open(output_file, 'r') as f:
-                text = f.read().strip()
+            output_file = Path(wav_file).with_suffix('.txt')
+            text = output_file.read_text(encoding='utf-8', errors='replace').strip()
             
             # Clean up
             if wav_file != audio_file:
                 os.remove(wav_file)
-            os.remove(output_file)
+            output_file.unlink(missing_ok=True)
             
             return {
                 "text": text,
@@ -273,8 +700,8 @@ class WhisperTranscriber:
                 response = openai.Audio.transcribe(
                     model="whisper-1",
                     file=f,
-                    language=None if self.config['language'] == 'auto' else self.config['language'],
-                    temperature=self.config['temperature']
+                    language=self.language,
+                    temperature=self.temperature
                 )
             
             return {
@@ -290,31 +717,19 @@ class WhisperTranscriber:
         """Transcribe using WhisperX (with alignment and diarization)"""
         import whisperx
         
-        # Load model
-        model = whisperx.load_model(
-            self.model_name,
-            device="auto" if self.config['device'] == 'auto' else self.config['device']
-        )
+        # Load model (cached across calls)
+        model = _get_whisperx(self.model_name, self.device)
         
         # Load audio
-        audio = whisperx.load_audio(audio_file)
+        audio = self.load_audio(audio_file, whisperx.load_audio)
         
         # Transcribe
         result = model.transcribe(audio)
         
         # Align (if model available)
-        if self.config['language'] != 'auto':
-            model_a, metadata = whisperx.load_align_model(
-                language_code=self.config['language'],
-                device="auto" if self.config['device'] == 'auto' else self.config['device']
-            )
-            result = whisperx.align(
-                result["segments"],
-                model_a,
-                metadata,
-                audio,
-                "auto" if self.config['device'] == 'auto' else self.config['device']
-            )
+        if self.language is not None:
+            model_a, metadata = _get_whisperx_align(self.language, self.device)
+            result = whisperx.align(result["segments"], model_a, metadata, audio, self.device)
         
         return {
             "text": " ".join([seg["text"] for seg in result["segments"]]),
@@ -322,12 +737,49 @@ class WhisperTranscriber:
             "backend": "whisperx"
         }
     
+    def transcribe_with_openvino(self, audio_file: str) -> Dict:
+        """Transcribe using OpenVINO GenAI on an NPU or integrated GPU"""
+        ov_cache = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'openvino_whisper'
+        model_dir = self.config['options']['openvino_model_dir'] or ov_cache / f'whisper-{self.model_name}'
+        if not Path(model_dir).is_dir():
+            raise FileNotFoundError(
+                f"No OpenVINO model at {model_dir}; export one with: optimum-cli export openvino "
+                f"--model openai/whisper-{self.model_name} {model_dir}"
+            )
+        
+        device = self.config['options']['openvino_device']
+        pipeline = _get_openvino(str(model_dir), device, str(ov_cache / 'compiled'))
+        
+        def ffmpeg_load(path):
+            # Only needed without PyAV
+            import whisper
+            return whisper.load_audio(path)
+        
+        audio = self.load_audio(audio_file, ffmpeg_load)
+        kwargs = {'task': 'transcribe'}
+        if self.language is not None:
+            kwargs['language'] = f'<|{self.language}|>'
+        result = pipeline.generate(audio, **kwargs)
+        
+        return {
+            "text": result.texts[0],
+            "device": device,
+            "backend": "openvino"
+        }
+    
+    def load_audio(self, audio_file: str, fallback):
+        """16 kHz mono float32 samples: PyAV in-process when installed, else fallback(audio_file)"""
+        try:
+            return load_audio_array(audio_file)
+        except ImportError:
+            return fallback(audio_file)
+    
     def ensure_wav_format(self, audio_file: str) -> str:
         """Convert audio to WAV format if needed"""
         if audio_file.endswith('.wav'):
             return audio_file
         
-        wav_file = audio_file.rsplit('.', 1)[0] + '.wav'
+        wav_file = str(Path(audio_file).with_suffix('.wav'))
         
         # Use ffmpeg to convert
         cmd = ['ffmpeg', '-i', audio_file, '-ar', '16000', '-ac', '1', wav_file, '-y']
@@ -336,7 +788,12 @@ class WhisperTranscriber:
         return wav_file
     
     def transcribe_microphone(self, duration: int = 5) -> Dict:
-        """Record from microphone and transcribe"""
+        """Record from microphone and transcribe
+        
+        With faster-whisper, audio is decoded in pause-aligned chunks on a
+        worker thread while capture goes on, so only the last chunk is left
+        to transcribe when recording stops.
+        """
         try:
             import sounddevice as sd
             import soundfile as sf
@@ -346,20 +803,55 @@ class WhisperTranscriber:
             sample_rate = 16000
             channels = 1
             
+            # The audio callback only hands blocks over; all work happens here
+            blocks = queue.Queue()
+            def callback(indata, frames, time_info, status):
+                blocks.put(indata[:, 0].copy())
+            
+            streaming = self.available_backends[:1] == ['faster-whisper']
+            wanted = int(duration * sample_rate)
+            captured = []
+            pending = []
+            pending_samples = 0
+            chunks = []
+            
             logger.info(f"Recording for {duration} seconds...")
             
-            # Record audio
-            audio_data = sd.rec(
-                int(duration * sample_rate),
-                samplerate=sample_rate,
-                channels=channels,
-                dtype='float32'
-            )
-            sd.wait()
+            with ThreadPoolExecutor(max_workers=1) as decoder:
+                # Record audio
+                with sd.InputStream(samplerate=sample_rate, channels=channels, dtype='float32',
+                                    blocksize=1024, callback=callback):
+                    recorded = 0
+                    while recorded < wanted:
+                        block = blocks.get(timeout=2)[:wanted - recorded]
+                        recorded += len(block)
+                        captured.append(block)
+                        if not streaming:
+                            continue
+                        pending.append(block)
+                        pending_samples += len(block)
+                        if pending_samples >= _MIC_MIN_CHUNK_SECONDS * sample_rate and \
+                                np.sqrt(np.mean(block ** 2)) < _MIC_SILENCE_RMS:
+                            chunks.append(decoder.submit(self.transcribe_samples, np.concatenate(pending)))
+                            pending = []
+                            pending_samples = 0
+                
+                if streaming:
+                    if pending:
+                        chunks.append(decoder.submit(self.transcribe_samples, np.concatenate(pending)))
+                    try:
+                        texts = [chunk.result() for chunk in chunks]
+                        return {
+                            "text": " ".join(text for text in texts if text),
+                            "duration": recorded / sample_rate,
+                            "backend": "faster-whisper"
+                        }
+                    except Exception as e:
+                        logger.warning(f"Chunked faster-whisper failed, transcribing the recording: {e}")
             
             # Save to temporary file
             with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_file:
-                sf.write(tmp_file.name, audio_data, sample_rate)
+                sf.write(tmp_file.name, np.concatenate(captured), sample_rate)
                 temp_path = tmp_file.name
             
             # Transcribe
@@ -375,9 +867,21 @@ class WhisperTranscriber:
         except Exception as e:
             return {"error": f"Microphone recording failed: {e}"}
     
+    def transcribe_samples(self, samples) -> str:
+        """Transcribe 16 kHz mono float32 samples with faster-whisper"""
+        segments, _ = self.load_faster_whisper_model().transcribe(
+            samples,
+            language=self.language,
+            temperature=self.temperature,
+            compression_ratio_threshold=self.compression_ratio_threshold,
+            log_prob_threshold=self.logprob_threshold,
+            no_speech_threshold=self.no_speech_threshold
+        )
+        return " ".join(segment.text.strip() for segment in segments)
+    
     def batch_transcribe(self, audio_dir: str, output_dir: str, 
-                        pattern: str = "*.wav") -> Tuple[int, int]:
-        """Batch transcribe audio files"""
+                        pattern: str = "*.wav", jobs: Optional[int] = None) -> Tuple[int, int]:
+        """Batch transcribe audio files, jobs files at a time (default: options.workers)"""
         audio_path = Path(audio_dir)
         output_path = Path(output_dir)
         
@@ -389,30 +893,74 @@ class WhisperTranscriber:
         
         audio_files = list(audio_path.glob(pattern))
         success_count = 0
+        remaining = audio_files
         
-        for audio_file in audio_files:
-            logger.info(f"Transcribing: {audio_file.name}")
-            
-            result = self.transcribe(str(audio_file))
-            
-            if "error" not in result:
-                # Save transcription
-                output_file = output_path / f"{audio_file.stem}.txt"
-                with open(output_file, 'w') as f:
-                    f.write(result["text"])
-                
-                # Save metadata
-                meta_file = output_path / f"{audio_file.stem}_meta.json"
-                with open(meta_file, 'w') as f:
-                    json.dump(result, f, indent=2)
-                
-                success_count += 1
-                logger.info(f"✓ Saved: {output_file}")
-            else:
-                logger.error(f"✗ Failed: {audio_file.name}")
+        # One faster-whisper model with batched decoding for the whole directory;
+        # anything it fails on goes through the regular per-file fallback below
+        if self.available_backends[:1] == ['faster-whisper']:
+            remaining = []
+            done = 0
+            try:
+                results = self.transcribe_batch([str(f) for f in audio_files],
+                                                self.batch_size)
+                for audio_file, result in zip(audio_files, results):
+                    done += 1
+                    if "error" in result:
+                        remaining.append(audio_file)
+                    else:
+                        self.save_transcription(result, output_path, audio_file)
+                        success_count += 1
+            except Exception as e:
+                # Missing batched pipeline, model load, CUDA or download errors
+                logger.warning(f"Batched faster-whisper failed, transcribing the rest one by one: {e}")
+                remaining.extend(audio_files[done:])
+        
+        jobs = jobs or self.config['options']['workers']
+        if jobs == 1 or len(remaining) <= 1:
+            success_count += sum(self.transcribe_to_files(f, output_path) for f in remaining)
+        else:
+            # Decoding runs in CTranslate2/torch or an external process, all of
+            # which release the GIL, so threads keep every worker busy
+            with ThreadPoolExecutor(max_workers=jobs) as ex:
+                futures = [ex.submit(self.transcribe_to_files, f, output_path) for f in remaining]
+                for future in as_completed(futures):
+                    success_count += future.result()
         
         return success_count, len(audio_files)
     
+    def transcribe_to_files(self, audio_file: Path, output_path: Path) -> bool:
+        """Transcribe one file of a batch into output_path; False if every backend failed"""
+        logger.info(f"Transcribing: {audio_file.name}")
+        
+        # The text goes straight to <stem>.txt while it is decoded
+        output_file = output_path / f"{audio_file.stem}.txt"
+        with open(output_file, 'w') as f:
+            result = self.transcribe(str(audio_file), output_fp=f)
+        
+        if "error" in result:
+            output_file.unlink(missing_ok=True)
+            logger.error(f"✗ Failed: {audio_file.name}")
+            return False
+        
+        self.save_transcription(result, output_path, audio_file, text_written=True)
+        return True
+    
+    def save_transcription(self, result: Dict, output_path: Path, audio_file: Path,
+                           text_written: bool = False) -> None:
+        """Write a batch result as <stem>.txt plus <stem>_meta.json"""
+        # Save transcription, unless it was streamed there already
+        output_file = output_path / f"{audio_file.stem}.txt"
+        if not text_written:
+            with open(output_file, 'w') as f:
+                f.write(result["text"])
+        
+        # Save metadata
+        meta_file = output_path / f"{audio_file.stem}_meta.json"
+        with open(meta_file, 'w', encoding='utf-8') as f:
+            f.write(dumps_json(result, self.pretty_json))
+        
+        logger.info(f"✓ Saved: {output_file}")
+    
     def check_system(self) -> Dict:
         """Check system capabilities"""
         status = {
@@ -421,11 +969,14 @@ class WhisperTranscriber:
             'system': {}
         }
         
-        # Check available models
-        models = ['tiny', 'base', 'small', 'medium', 'large']
-        for model in models:
-            model_path = Path.home() / '.cache' / 'whisper' / f'{model}.pt'
-            status['models'][model] = model_path.exists()
+        # Check available models: one directory listing instead of a stat per model
+        cache_dir = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'whisper'
+        try:
+            with os.scandir(cache_dir) as entries:
+                present = {entry.name for entry in entries}
+        except OSError:
+            present = set()
+        status['models'] = {model: f'{model}.pt' in present for model in WHISPER_MODELS}
         
         # Check system tools
         status['system']['ffmpeg'] = self.check_command('ffmpeg')
@@ -458,7 +1009,7 @@ def main():
     )
     parser.add_argument(
         '--model', '-m',
-        choices=['tiny', 'base', 'small', 'medium', 'large'],
+        choices=WHISPER_MODELS,
         default='base',
         help='Whisper model size (default: base)'
     )
@@ -469,7 +1020,7 @@ def main():
     )
     parser.add_argument(
         '--backend', '-b',
-        choices=['whisper-python', 'whisper-cpp', 'faster-whisper', 'openai-api', 'whisperx'],
+        choices=['whisper-python', 'whisper-cpp', 'faster-whisper', 'openai-api', 'whisperx', 'openvino'],
         help='Force specific backend'
     )
     parser.add_argument(
@@ -499,6 +1050,16 @@ def main():
         default='*.wav',
         help='File pattern for batch mode (default: *.wav)'
     )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        help='Files transcribed in parallel in batch mode (default: options.workers)'
+    )
+    parser.add_argument(
+        '--pretty',
+        action='store_true',
+        help='Indent JSON output and batch _meta.json files'
+    )
     parser.add_argument(
         '--check',
         action='store_true',
@@ -535,7 +1096,12 @@ def main():
             json.dump(config, f)
             config_file = f.name
     
-    transcriber = WhisperTranscriber(config_file)
+    # Preload only what will run: nothing for --check, and the --backend choice
+    # for single files (batch and microphone modes don't take --backend)
+    transcriber = WhisperTranscriber(config_file, preload=not args.check,
+                                     backend=None if args.batch or args.microphone else args.backend)
+    if args.pretty:
+        transcriber.pretty_json = True
     
     # Clean up temp config
     if config and config_file and 'tmp' in config_file:
@@ -577,9 +1143,9 @@ def main():
         print(result["text"])
         
         if args.output:
-            with open(args.output, 'w') as f:
+            with open(args.output, 'w', encoding='utf-8') as f:
                 if args.format == 'json':
-                    json.dump(result, f, indent=2)
+                    f.write(dumps_json(result, transcriber.pretty_json))
                 else:
                     f.write(result["text"])
             print(f"\nSaved to: {args.output}")
@@ -599,11 +1165,33 @@ def main():
         success, total = transcriber.batch_transcribe(
             args.input,
             args.output,
-            args.pattern
+            args.pattern,
+            jobs=args.jobs
         )
         print(f"\nBatch transcription complete: {success}/{total} files")
         return 0 if success == total else 1
     
+    # Plain text is printed live, segment by segment, as it is decoded
+    if args.format == 'text':
+        out = open(args.output, 'w') if args.output else sys.stdout
+        try:
+            result = transcriber.transcribe(args.input, args.backend, output_fp=out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        
+        if "error" in result:
+            if args.output:
+                os.remove(args.output)
+            print(f"Error: {result['error']}")
+            return 1
+        
+        if args.output:
+            print(f"Transcription saved to: {args.output}")
+        else:
+            print()
+        return 0
+    
     # Single file transcription
     result = transcriber.transcribe(args.input, args.backend)
     
@@ -613,7 +1201,7 @@ def main():
     
     # Output results
     if args.format == 'json':
-        output = json.dumps(result, indent=2)
+        output = dumps_json(result, transcriber.pretty_json)
     elif args.format == 'srt' and 'segments' in result:
         # Simple SRT format
         output = ""